@@ -12,7 +12,7 @@
 # CONDITIONS OF ANY KIND, either express or implied. See the License for the
 # specific language governing permissions and limitations under the License.
 
-import sys, os, os.path, glob, urllib, urllib.request, codecs
+import sys, os, os.path, collections, json, shutil, threading, urllib, urllib.request
 from urllib.error import HTTPError
 from urllib.parse import urlparse
 
@@ -32,76 +32,155 @@ class Cache(object):
         if not os.path.exists(self.root):
             os.makedirs(self.root)
         self.max_size = max_size
+        # file name -> (path, size), least recently used first
+        # Each payload is stored as the mangled url, with its ETag and Last-Modified in a .meta file next to it
+        self._lru = collections.OrderedDict()
+        self._total_size = 0
+        # downloads may run on several threads, which share the index
+        self._lock = threading.RLock()
+        with os.scandir(self.root) as it:
+            entries = [(e.name, e.path, e.stat()) for e in it]
+        entries.sort(key = lambda e: e[2].st_mtime)
+        names = set(name for name, _, _ in entries)
+        for name, path, st in entries:
+            if name.endswith('.meta'):
+                if name[:-len('.meta')] not in names:
+                    _remove_file(path)
+                continue
+            # unfinished downloads (and files in older formats) are never looked up, only evicted
+            self._insert(name, path, st.st_size)
 
     def _url_to_path(self, url):
         return os.path.join(self.root, mangle(url))
 
+    def _insert(self, name, path, size):
+        self._lru[name] = (path, size)
+        self._total_size += size
+
+    def _evict(self, name):
+        entry = self._lru.pop(name, None)
+        if entry is None:
+            return
+        path, size = entry
+        self._total_size -= size
+        _remove_file(path)
+        _remove_file(path + '.meta')
+
     def get(self, url):
-        path = self._url_to_path(url)
-        pattern = '%s-*' % (path)
-        matches = glob.glob(pattern)
-
-        if matches:
-            match = matches[0]
-            if match.endswith('_tmp'):
-                os.remove(match)
-                return None
-            key = match.rsplit('-', 1)[1]
-            os.utime(match, None)
-            return (match, codecs.decode(key, 'hex'))
-        else:
+        with self._lock:
+            return self._get(url)
+
+    def _get(self, url):
+        name = mangle(url)
+        entry = self._lru.get(name)
+        if entry is None:
             return None
 
+        path, _ = entry
+        try:
+            os.utime(path, None)
+        except OSError:
+            self._evict(name)
+            return None
+        self._lru.move_to_end(name)
+        try:
+            with open(path + '.meta') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        return (path, meta.get('etag', ''), meta.get('lastmod', ''))
+
     def _accomodate(self, size):
-        matches = glob.glob('%s/*' % (self.root))
-        matches.sort(key = lambda p: os.path.getmtime(p), reverse = True)
-        total_size = 0
-        for p in matches:
-            total_size += os.path.getsize(p)
-            if total_size + size > self.max_size:
-                os.remove(p)
-
-    def put(self, url, key, size):
-        path = self._url_to_path(url)
-        pattern = '%s-*' % (path)
-        matches = glob.glob(pattern)
-        for p in matches:
-            try:
-                os.remove(p)
-            except Exception as e:
-                log(str(e))
+        while self._lru and self._total_size + size > self.max_size:
+            name = next(iter(self._lru))
+            self._evict(name)
+
+    def tmp_path(self, url):
+        # each process and thread downloads to a file of its own, in case the same url is downloaded twice at once
+        return '%s_tmp%d_%d' % (self._url_to_path(url), os.getpid(), threading.get_ident())
+
+    def put(self, url, etag, lastmod, tmp):
+        with self._lock:
+            return self._put(url, etag, lastmod, tmp)
+
+    def _put(self, url, etag, lastmod, tmp):
+        # the payload is only added once it has been downloaded completely
+        name = mangle(url)
+        size = os.path.getsize(tmp)
+        self._evict(name)
         self._accomodate(size)
-        return '%s-%s' % (path, codecs.encode(key.encode(), 'hex').decode('ascii'))
+        path = self._url_to_path(url)
+        os.replace(tmp, path)
+        meta = path + '.meta'
+        meta_tmp = '%s_tmp%d' % (meta, os.getpid())
+        with open(meta_tmp, 'w') as f:
+            json.dump({'etag': etag, 'lastmod': lastmod}, f)
+        os.replace(meta_tmp, meta)
+        self._insert(name, path, size)
+        return path
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log(str(e))
+
+class _ProgressWriter(object):
+    def __init__(self, f, size, cb, cb_count):
+        self.f = f
+        self.size = size
+        self.cb = cb
+        self.n = 0
+        # report progress each time another 1/cb_count of the size has been written
+        self.step = max(1, size // cb_count)
+        self.next_threshold = self.step if size > 0 else float('inf')
+
+    def write(self, buf):
+        self.f.write(buf)
+        self.n += len(buf)
+        if self.n >= self.next_threshold:
+            self.next_threshold = (self.n // self.step + 1) * self.step
+            self.cb(self.n, self.size)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def _get_cache():
+    # the index is built from the cache directory once, and then shared by all downloads
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = Cache('~/.dcache', 10**9 * 4)
+        return _cache
 
 def download(url, cb = None, cb_count = 10):
-    c = Cache('~/.dcache', 10**9 * 4)
+    c = _get_cache()
     hit = c.get(url)
     headers = {}
     if hit:
-        headers = {'If-None-Match' : '%s' % (hit[1])}
+        if hit[1]:
+            headers['If-None-Match'] = hit[1]
+        if hit[2]:
+            headers['If-Modified-Since'] = hit[2]
     req = urllib.request.Request(url, None, headers)
     try:
         response = urllib.request.urlopen(req)
         if response.code == 200:
             size = int(response.headers.get('Content-Length', 0))
-            key = response.headers.get('ETag', '')
-            path = c.put(url, key, size)
-            tmp = path + '_tmp'
-            with open(tmp, 'wb') as f:
-                buf = response.read(1024 * 1024)
-                n = 0
-                cb_i = 0
-                while buf:
-                    n += len(buf)
-                    rate = n / float(size)
+            etag = response.headers.get('ETag', '')
+            lastmod = response.headers.get('Last-Modified', '')
+            tmp = c.tmp_path(url)
+            try:
+                with open(tmp, 'wb') as f:
+                    out = f
                     if cb is not None:
-                        if cb_i < int(rate * cb_count):
-                            cb_i = int(rate * cb_count)
-                            cb(n, size)
-                    f.write(buf)
-                    buf = response.read(1024 * 1024)
-            os.rename(tmp, path)
-            return path
+                        out = _ProgressWriter(f, size, cb, cb_count)
+                    shutil.copyfileobj(response, out, 1024 * 1024)
+                return c.put(url, etag, lastmod, tmp)
+            finally:
+                _remove_file(tmp) # only left if the download failed
         else:
             return None
     except HTTPError as e:
@@ -12,7 +12,9 @@
 # CONDITIONS OF ANY KIND, either express or implied. See the License for the
 # specific language governing permissions and limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from log import log
 from string import Template
 import base64
@@ -20,13 +22,39 @@ import github
 import json
 import mimetypes
 import os
-import re
 import run
 import s3
 import subprocess
 import urllib
 from urllib.parse import urlparse
 
+MAX_TRANSFER_WORKERS = 6
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+EDITOR_FILES = frozenset(('Defold-x86_64-macos.dmg',
+                          'Defold-x86_64-linux.zip',
+                          'Defold-x86_64-win32.zip'))
+MAIN_FILES = frozenset(('bob.jar', 'ref-doc.zip'))
+PLATFORM_FILES = frozenset(('gdc', 'gdc.exe'))
+
+class ChunkedFile(object):
+    """ Streams a file in large chunks. The length is still reported, so the
+        request is sent with a Content-Length instead of chunked encoding """
+    def __init__(self, f, chunk_size = UPLOAD_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return os.fstat(self.f.fileno()).st_size - self.f.tell()
+
+    def __iter__(self):
+        while True:
+            buf = self.f.read(self.chunk_size)
+            if not buf:
+                break
+            yield buf
+
+@lru_cache(maxsize=None)
 def get_current_repo():
     # git@github.com:defold/defold.git
     # https://github.com/defold/defold.git
@@ -40,6 +68,7 @@ def get_current_repo():
         return None
     return url[index+len(domain)+1:]
 
+@lru_cache(maxsize=None)
 def get_git_sha1(ref = 'HEAD'):
     process = subprocess.Popen(['git', 'rev-parse', ref], stdout = subprocess.PIPE)
     out, err = process.communicate()
@@ -47,9 +76,11 @@ def get_git_sha1(ref = 'HEAD'):
         sys.exit("Unable to find git sha from ref: %s" % (ref))
     return out.strip()
 
+@lru_cache(maxsize=None)
 def get_git_branch():
     return run.shell_command('git rev-parse --abbrev-ref HEAD').strip()
 
+@lru_cache(maxsize=None)
 def get_defold_version_from_file():
     """ Gets the version number and checks if that tag exists """
     with open('../VERSION', 'r') as version_file:
@@ -142,18 +173,6 @@ def release(config, tag_name, release_sha, s3_release, release_name=None, body=N
     log("Uploading artifacts to GitHub from S3")
     base_url = "https://" + urlparse(config.archive_path).hostname
 
-    def is_editor_file(path):
-        return os.path.basename(path) in ('Defold-x86_64-macos.dmg',
-                                          'Defold-x86_64-linux.zip',
-                                          'Defold-x86_64-win32.zip')
-
-    def is_main_file(path):
-        return os.path.basename(path) in ('bob.jar', 'ref-doc.zip') or is_editor_file(path) or 'engine/defoldsdk.zip' in path
-
-    def is_platform_file(path):
-        return os.path.basename(path) in ('gdc',
-                                          'gdc.exe')
-
     def get_platform(path):
         if 'linux' in path: return 'linux'
         if 'darwin' in path: return 'macos'
@@ -167,50 +186,50 @@ def release(config, tag_name, release_sha, s3_release, release_name=None, body=N
         name, ext = os.path.splitext(basename)
         return '%s-%s%s' % (name, platform, ext if ext else '')
 
-    urls = set() # not sure why some files are reported twice, but we don't want to download/upload them twice
-    for file in s3_release.get("files", None):
-        # download file
+    urls = {} # download url -> asset name. Some files are reported twice, but we don't want to download/upload them twice
+    for file in s3_release.get("files", ()):
         path = file.get("path")
+        basename = os.path.basename(path)
 
-        if editor_only and not is_editor_file(path):
+        if editor_only and basename not in EDITOR_FILES:
             continue
 
-        keep = False
-        if is_main_file(path) or is_platform_file(path):
-            keep = True
-
-        if not keep:
+        if basename in MAIN_FILES or basename in EDITOR_FILES or 'engine/defoldsdk.zip' in path:
+            name = basename
+        elif basename in PLATFORM_FILES:
+            name = convert_to_platform_name(path)
+        else:
             continue
 
         download_url = base_url + path
-        urls.add(download_url)
+        urls[download_url] = name
 
     upload_url = release.get("upload_url").replace("{?name,label}", "?name=%s")
 
-    for download_url in urls:
+    def upload_asset(item):
+        download_url, name = item
         filepath = config._download(download_url)
-        filename = re.sub(r'https://%s/archive/(.*?)/' % config.archive_path, '', download_url)
-        basename = os.path.basename(filename)
+        basename = os.path.basename(download_url)
         # file stream upload to GitHub
         with open(filepath, 'rb') as f:
             content_type,_ = mimetypes.guess_type(basename)
             headers = { "Content-Type": content_type or "application/octet-stream" }
-            name = filename
-            if is_main_file(download_url):
-                name = basename
-            elif is_platform_file(download_url):
-                name = convert_to_platform_name(download_url)
-
-            # Since there is no way to update an asset, we need to remove it first.
-            old_asset = prev_assets.get(name, None)
-            if old_asset is not None:
-                asset_url = old_asset.get("url")
-                log("Deleting %s -  %s" % (old_asset.get("id"), old_asset.get("name")))
-                github.delete(asset_url, config.github_token)
 
             url = upload_url % (name)
             log("Uploading to GitHub " + url)
-            github.post(url, config.github_token, data = f, headers = headers)
+            github.post(url, config.github_token, data = ChunkedFile(f), headers = headers)
+
+    # Since there is no way to update an asset, we need to remove it first.
+    def delete_asset(old_asset):
+        log("Deleting %s -  %s" % (old_asset.get("id"), old_asset.get("name")))
+        github.delete(old_asset.get("url"), config.github_token)
+
+    old_assets = [prev_assets[name] for name in urls.values() if name in prev_assets]
+
+    # The transfers are independent and network bound, so we run a few of them at the same time
+    with ThreadPoolExecutor(max_workers = MAX_TRANSFER_WORKERS) as executor:
+        list(executor.map(delete_asset, old_assets))
+        list(executor.map(upload_asset, urls.items()))
 
     log("Released Defold %s to GitHub" % tag_name)
 
@@ -28,6 +28,8 @@ import log
 import run
 import platform
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 DYNAMO_HOME=os.environ.get('DYNAMO_HOME', os.path.join(os.getcwd(), 'tmp', 'dynamo_home'))
 
@@ -82,53 +84,53 @@ PACKAGES_XCODE_TOOLCHAIN="XcodeDefault%s.xctoolchain" % VERSION_XCODE
 
 # The "pattern" is the path relative to the tmp/dynamo/ext/SDKs/ folder 
 
-defold_info = defaultdict(defaultdict)
-defold_info['xcode']['version'] = VERSION_XCODE
-defold_info['xcode']['pattern'] = PACKAGES_XCODE_TOOLCHAIN
-defold_info['xcode-clang']['version'] = VERSION_XCODE_CLANG
-defold_info['arm64-ios']['version'] = VERSION_IPHONEOS
-defold_info['arm64-ios']['pattern'] = PACKAGES_IOS_SDK
-defold_info['x86_64-ios']['version'] = VERSION_IPHONESIMULATOR
-defold_info['x86_64-ios']['pattern'] = PACKAGES_IOS_SIMULATOR_SDK
-defold_info['x86_64-macos']['version'] = VERSION_MACOSX
-defold_info['x86_64-macos']['pattern'] = PACKAGES_MACOS_SDK
-defold_info['arm64-macos']['version'] = VERSION_MACOSX
-defold_info['arm64-macos']['pattern'] = PACKAGES_MACOS_SDK
-
-defold_info['x86_64-win32']['version'] = VERSION_WINDOWS_SDK_10
-defold_info['x86_64-win32']['pattern'] = "Win32/%s" % PACKAGES_WIN32_TOOLCHAIN
-defold_info['win32']['version'] = defold_info['x86_64-win32']['version']
-defold_info['win32']['pattern'] = defold_info['x86_64-win32']['pattern']
-
-defold_info['win10sdk']['version'] = VERSION_WINDOWS_SDK_10
-defold_info['win10sdk']['pattern'] = "Win32/%s" % PACKAGES_WIN32_SDK_10
-
-defold_info['x86_64-linux']['version'] = VERSION_LINUX_CLANG
-defold_info['x86_64-linux']['pattern'] = 'linux/clang-%s' % VERSION_LINUX_CLANG
+defold_info = {
+    'xcode':        {'version': VERSION_XCODE, 'pattern': PACKAGES_XCODE_TOOLCHAIN},
+    'xcode-clang':  {'version': VERSION_XCODE_CLANG},
+    'arm64-ios':    {'version': VERSION_IPHONEOS, 'pattern': PACKAGES_IOS_SDK},
+    'x86_64-ios':   {'version': VERSION_IPHONESIMULATOR, 'pattern': PACKAGES_IOS_SIMULATOR_SDK},
+    'x86_64-macos': {'version': VERSION_MACOSX, 'pattern': PACKAGES_MACOS_SDK},
+    'arm64-macos':  {'version': VERSION_MACOSX, 'pattern': PACKAGES_MACOS_SDK},
+
+    'x86_64-win32': {'version': VERSION_WINDOWS_SDK_10, 'pattern': "Win32/%s" % PACKAGES_WIN32_TOOLCHAIN},
+    'win32':        {'version': VERSION_WINDOWS_SDK_10, 'pattern': "Win32/%s" % PACKAGES_WIN32_TOOLCHAIN},
+
+    'win10sdk':     {'version': VERSION_WINDOWS_SDK_10, 'pattern': "Win32/%s" % PACKAGES_WIN32_SDK_10},
+
+    'x86_64-linux': {'version': VERSION_LINUX_CLANG, 'pattern': 'linux/clang-%s' % VERSION_LINUX_CLANG},
+}
+
+DARWIN_PLATFORMS = frozenset(('x86_64-macos', 'arm64-macos', 'arm64-ios', 'x86_64-ios'))
+MACOS_PLATFORMS = frozenset(('x86_64-macos', 'arm64-macos'))
+WINDOWS_PLATFORMS = frozenset(('x86_64-win32', 'win32'))
+ANDROID_PLATFORMS = frozenset(('armv7-android', 'arm64-android'))
 
 ## **********************************************************************************************
 ## DARWIN
 
 
 def _convert_darwin_platform(platform):
-    if platform in ('x86_64-macos','arm64-macos'):
+    if platform in MACOS_PLATFORMS:
         return 'macosx'
-    if platform in ('arm64-ios',):
+    if platform == 'arm64-ios':
         return 'iphoneos'
-    if platform in ('x86_64-ios',):
+    if platform == 'x86_64-ios':
         return 'iphonesimulator'
     return 'unknown'
 
+@lru_cache(maxsize=None)
 def _get_xcode_local_path():
     return run.shell_command('xcode-select -print-path')
 
 # "xcode-select -print-path" will give you "/Applications/Xcode.app/Contents/Developer"
+@lru_cache(maxsize=None)
 def get_local_darwin_toolchain_path():
     default_path = '%s/Toolchains/XcodeDefault.xctoolchain' % _get_xcode_local_path()
     if os.path.exists(default_path):
         return default_path
     return '/Library/Developer/CommandLineTools'
 
+@lru_cache(maxsize=None)
 def get_local_darwin_toolchain_version():
     if not os.path.exists('/usr/bin/xcodebuild'):
         return VERSION_XCODE
@@ -139,6 +141,7 @@ def get_local_darwin_toolchain_version():
     xcode_version = xcode_version_lines[0].split()[1].strip()
     return xcode_version
 
+@lru_cache(maxsize=None)
 def get_local_darwin_clang_version():
     # Apple clang version 14.0.0 (clang-1400.0.29.202)
     # Target: x86_64-apple-darwin22.3.0
@@ -147,11 +150,19 @@ def get_local_darwin_clang_version():
     version = version_lines[0].split()[3].strip()
     return version
 
+# Returns (path, version), queried with a single shell invocation
+@lru_cache(maxsize=None)
+def _get_local_darwin_sdk_path_and_version(platform):
+    sdk = _convert_darwin_platform(platform)
+    output = run.shell_command('xcrun -f --sdk %s --show-sdk-path && xcrun -f --sdk %s --show-sdk-platform-version' % (sdk, sdk))
+    lines = output.strip().split("\n")
+    return (lines[0].strip(), lines[-1].strip())
+
 def get_local_darwin_sdk_path(platform):
-    return run.shell_command('xcrun -f --sdk %s --show-sdk-path' % _convert_darwin_platform(platform)).strip()
+    return _get_local_darwin_sdk_path_and_version(platform)[0]
 
 def get_local_darwin_sdk_version(platform):
-    return run.shell_command('xcrun -f --sdk %s --show-sdk-platform-version' % _convert_darwin_platform(platform)).strip()
+    return _get_local_darwin_sdk_path_and_version(platform)[1]
 
 
 ## **********************************************************************************************
@@ -163,21 +174,22 @@ def get_local_darwin_sdk_version(platform):
 
 # Linux
 
-_is_wsl = None
-
-def is_wsl():
-    global _is_wsl
-    if _is_wsl is not None:
-        return _is_wsl
-
+def _detect_wsl():
     """ Checks if we're running on native Linux on in WSL """
-    _is_wsl = False
-    if 'Linux' == platform.system():
+    if 'Linux' != platform.system():
+        return False
+    try:
         with open("/proc/version") as f:
-            data = f.read()
-            _is_wsl = "Microsoft" in data
-    return _is_wsl
+            return "Microsoft" in f.read()
+    except OSError:
+        return False
+
+IS_WSL = _detect_wsl()
 
+def is_wsl():
+    return IS_WSL
+
+@lru_cache(maxsize=None)
 def get_local_compiler_from_bash():
     path = run.shell_command('which clang++')
     if path != None:
@@ -187,6 +199,7 @@ def get_local_compiler_from_bash():
         return "g++"
     return None
 
+@lru_cache(maxsize=None)
 def get_local_compiler_path():
     tool = get_local_compiler_from_bash()
     if tool is None:
@@ -200,6 +213,7 @@ def get_local_compiler_path():
         return path
     return None
 
+@lru_cache(maxsize=None)
 def get_local_compiler_version():
     tool = get_local_compiler_from_bash()
     if tool is None:
@@ -222,18 +236,24 @@ def get_windows_local_sdk_info(platform):
     vswhere_path = '%s/../../scripts/windows/vswhere2/vswhere2.exe' % os.environ['DYNAMO_HOME']
     if not os.path.exists(vswhere_path):
         vswhere_path = './scripts/windows/vswhere2/vswhere2.exe'
-        vswhere_path = path.normpath(vswhere_path)
+        vswhere_path = os.path.normpath(vswhere_path)
         if not os.path.exists(vswhere_path):
             print ("Couldn't find executable '%s'" % vswhere_path)
             return None
 
-    sdk_root = run.shell_command('%s --sdk_root' % vswhere_path).strip()
-    sdk_version = run.shell_command('%s --sdk_version' % vswhere_path).strip()
-    includes = run.shell_command('%s --includes' % vswhere_path).strip()
-    lib_paths = run.shell_command('%s --lib_paths' % vswhere_path).strip()
-    bin_paths = run.shell_command('%s --bin_paths' % vswhere_path).strip()
-    vs_root = run.shell_command('%s --vs_root' % vswhere_path).strip()
-    vs_version = run.shell_command('%s --vs_version' % vswhere_path).strip()
+    # Without a flag, vswhere2 outputs all properties as "key: value" lines
+    properties = {}
+    for line in run.shell_command(vswhere_path).split('\n'):
+        key, _, value = line.partition(':')
+        properties[key.strip()] = value.strip()
+
+    sdk_root = properties.get('sdk_root', '')
+    sdk_version = properties.get('sdk_version', '')
+    includes = properties.get('includes', '')
+    lib_paths = properties.get('lib_paths', '')
+    bin_paths = properties.get('bin_paths', '')
+    vs_root = properties.get('vs_root', '')
+    vs_version = properties.get('vs_version', '')
 
     if platform == 'win32':
         arch64 = 'x64'
@@ -252,6 +272,13 @@ def get_windows_local_sdk_info(platform):
     windows_info = info
     return windows_info
 
+def _get_latest_version(dirs, prefix):
+    # Compare the versions numerically, component by component
+    versions = [x for x in dirs if x.startswith(prefix)]
+    if not versions:
+        return None
+    return max(versions, key=lambda x: tuple(int(p) for p in x.split('.') if p.isdigit()))
+
 def get_windows_packaged_sdk_info(sdkdir, platform):
     global windows_info
     if windows_info is not None:
@@ -266,19 +293,15 @@ def get_windows_packaged_sdk_info(sdkdir, platform):
         arch = 'x86'
 
     # Since the programs(Windows!) can update, we do this dynamically to find the correct version
-    ucrt_dirs = [ x for x in os.listdir(os.path.join(windowskitsdir,'10','Include'))]
-    ucrt_dirs = [ x for x in ucrt_dirs if x.startswith('10.0')]
-    ucrt_dirs.sort(key=lambda x: int((x.split('.'))[2]))
-    ucrt_version = ucrt_dirs[-1]
-    if not ucrt_version.startswith('10.0'):
-        conf.fatal("Unable to determine ucrt version: '%s'" % ucrt_version)
-
-    msvc_version = [x for x in os.listdir(os.path.join(msvcdir,'VC','Tools','MSVC'))]
-    msvc_version = [x for x in msvc_version if x.startswith('14.')]
-    msvc_version.sort(key=lambda x: map(int, x.split('.')))
-    msvc_version = msvc_version[-1]
-    if not msvc_version.startswith('14.'):
-        conf.fatal("Unable to determine msvc version: '%s'" % msvc_version)
+    ucrt_dirs = os.listdir(os.path.join(windowskitsdir,'10','Include'))
+    ucrt_version = _get_latest_version(ucrt_dirs, '10.0')
+    if ucrt_version is None:
+        raise Exception("Unable to determine ucrt version from: %s" % ucrt_dirs)
+
+    msvc_dirs = os.listdir(os.path.join(msvcdir,'VC','Tools','MSVC'))
+    msvc_version = _get_latest_version(msvc_dirs, '14.')
+    if msvc_version is None:
+        raise Exception("Unable to determine msvc version from: %s" % msvc_dirs)
 
     msvc_path = (os.path.join(msvcdir,'VC', 'Tools', 'MSVC', msvc_version, 'bin', 'Host'+arch, arch),
                 os.path.join(windowskitsdir,'10','bin',ucrt_version,arch))
@@ -341,19 +364,19 @@ def check_defold_sdk(sdkfolder, platform):
     folders = []
     print ("check_defold_sdk", sdkfolder, platform)
 
-    if platform in ('x86_64-macos', 'arm64-macos', 'arm64-ios', 'x86_64-ios'):
+    if platform in DARWIN_PLATFORMS:
         folders.append(_get_defold_path(sdkfolder, 'xcode'))
         folders.append(_get_defold_path(sdkfolder, platform))
 
-    if platform in ('x86_64-win32', 'win32'):
+    if platform in WINDOWS_PLATFORMS:
         folders.append(os.path.join(sdkfolder, 'Win32','WindowsKits','10'))
         folders.append(os.path.join(sdkfolder, 'Win32','MicrosoftVisualStudio14.0','VC'))
 
-    if platform in ('armv7-android', 'arm64-android'):
+    if platform in ANDROID_PLATFORMS:
         folders.append(os.path.join(sdkfolder, "android-ndk-r%s" % ANDROID_NDK_VERSION))
         folders.append(os.path.join(sdkfolder, "android-sdk"))
 
-    if platform in ('x86_64-linux',):
+    if platform == 'x86_64-linux':
         folders.append(os.path.join(sdkfolder, "linux"))
 
     if not folders:
@@ -369,11 +392,11 @@ def check_defold_sdk(sdkfolder, platform):
     return count == len(folders)
 
 def check_local_sdk(platform):
-    if platform in ('x86_64-macos', 'arm64-macos', 'arm64-ios', 'x86_64-ios'):
+    if platform in DARWIN_PLATFORMS:
         xcode_version = get_local_darwin_toolchain_version()
         if not xcode_version:
             return False
-    if platform in ('win32', 'x86_64-win32'):
+    if platform in WINDOWS_PLATFORMS:
         info = get_windows_local_sdk_info(platform)
         return info is not None
 
@@ -382,7 +405,7 @@ def check_local_sdk(platform):
 
 def _get_defold_sdk_info(sdkfolder, platform):
     info = {}
-    if platform in ('x86_64-macos', 'arm64-macos','x86_64-ios','arm64-ios'):
+    if platform in DARWIN_PLATFORMS:
         info['xcode'] = {}
         info['xcode']['version'] = VERSION_XCODE
         info['xcode']['path'] = _get_defold_path(sdkfolder, 'xcode')
@@ -393,12 +416,12 @@ def _get_defold_sdk_info(sdkfolder, platform):
         info[platform]['version'] = defold_info[platform]['version']
         info[platform]['path'] = _get_defold_path(sdkfolder, platform) # what we use for sysroot
     
-    elif platform in ('x86_64-linux',):
+    elif platform == 'x86_64-linux':
         info[platform] = {}
         info[platform]['version'] = defold_info[platform]['version']
         info[platform]['path'] = _get_defold_path(sdkfolder, platform)
 
-    if platform in ('win32', 'x86_64-win32'):
+    if platform in WINDOWS_PLATFORMS:
         windowsinfo = get_windows_packaged_sdk_info(sdkfolder, platform)
         return _setup_info_from_windowsinfo(windowsinfo, platform)
 
@@ -406,26 +429,32 @@ def _get_defold_sdk_info(sdkfolder, platform):
 
 def _get_local_sdk_info(platform):
     info = {}
-    if platform in ('x86_64-macos', 'arm64-macos','x86_64-ios','arm64-ios'):
+    if platform in DARWIN_PLATFORMS:
+        # The probes are independent, and each one spawns processes, so we run them concurrently
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            xcode_version = executor.submit(get_local_darwin_toolchain_version)
+            xcode_path = executor.submit(get_local_darwin_toolchain_path)
+            clang_version = executor.submit(get_local_darwin_clang_version)
+            sdk_path_and_version = executor.submit(_get_local_darwin_sdk_path_and_version, platform)
+
         info['xcode'] = {}
-        info['xcode']['version'] = get_local_darwin_toolchain_version()
-        info['xcode']['path'] = get_local_darwin_toolchain_path()
-        info['xcode-clang'] = get_local_darwin_clang_version()
+        info['xcode']['version'] = xcode_version.result()
+        info['xcode']['path'] = xcode_path.result()
+        info['xcode-clang'] = clang_version.result()
         info['asan'] = {}
         info['asan']['path'] = os.path.join(info['xcode']['path'], MACOS_ASAN_PATH%info['xcode-clang'])
         info[platform] = {}
-        info[platform]['version'] = get_local_darwin_sdk_version(platform)
-        info[platform]['path'] = get_local_darwin_sdk_path(platform) # what we use for sysroot
+        info[platform]['path'], info[platform]['version'] = sdk_path_and_version.result() # path is what we use for sysroot
 
         if not os.path.exists(info['asan']['path']):
             print("sdk.py: Couldn't find '%s'" % info['asan']['path'], file=sys.stderr)
 
-    elif platform in ('x86_64-linux',):
+    elif platform == 'x86_64-linux':
         info[platform] = {}
         info[platform]['version'] = get_local_compiler_version()
         info[platform]['path'] = get_local_compiler_path()
 
-    if platform in ('win32', 'x86_64-win32'):
+    if platform in WINDOWS_PLATFORMS:
         windowsinfo = get_windows_local_sdk_info(platform)
         return _setup_info_from_windowsinfo(windowsinfo, platform)
 
@@ -451,9 +480,9 @@ def get_sdk_info(sdkfolder, platform):
     return None
 
 def get_toolchain_root(sdkinfo, platform):
-    if platform in ('x86_64-macos','arm64-macos','x86_64-ios','arm64-ios'):
+    if platform in DARWIN_PLATFORMS:
         return sdkinfo['xcode']['path']
-    if platform in ('x86_64-linux',):
+    if platform == 'x86_64-linux':
         return sdkinfo['x86_64-linux']['path']
     return None
 
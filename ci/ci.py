@@ -18,33 +18,122 @@ import subprocess
 import platform
 import os
 import base64
+import shutil
+import tempfile
+import time
 from argparse import ArgumentParser
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from ci_helper import is_platform_supported, is_repo_private
 
+# These only depend on the environment, which doesn't change during a run
+is_repo_private = lru_cache(maxsize=1)(is_repo_private)
+is_platform_supported = lru_cache(maxsize=None)(is_platform_supported)
+
 # The platforms we deploy our editor on
 PLATFORMS_DESKTOP = ('x86_64-linux', 'x86_64-win32', 'x86_64-macos')
 
-def call(args, failonerror = True):
-    print(args)
-    process = subprocess.Popen(args, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, shell = True)
+# A larger pipe lets chatty build steps keep writing while we forward their output
+PIPE_SIZE = 1024 * 1024
+
+# Seconds between flushes of forwarded output, when stdout isn't a terminal
+FLUSH_INTERVAL = 1.0
+
+def set_pipe_size(pipe):
+    try:
+        import fcntl
+        F_SETPIPE_SZ = 1031 # Linux only
+        fcntl.fcntl(pipe.fileno(), F_SETPIPE_SZ, PIPE_SIZE)
+    except (ImportError, OSError):
+        pass
+
+@lru_cache(maxsize=None)
+def _which(program):
+    return shutil.which(program) or program
+
+def _spawn_args(args, shell):
+    if shell:
+        return args, {}
+    # CPython can only spawn the child with posix_spawn (vfork) instead of fork+exec when the
+    # executable is an absolute path and close_fds is off. Python's own fds aren't inherited (PEP 446)
+    return [_which(args[0])] + list(args[1:]), {'close_fds': os.name != 'posix'}
+
+def _run(args, shell = False, input = None, echo = True, capture = True):
+    args, kwargs = _spawn_args(args, shell)
+    if sys.version_info >= (3, 10):
+        kwargs['pipesize'] = PIPE_SIZE
+    stdin = subprocess.PIPE if input is not None else None
+    process = subprocess.Popen(args, stdin = stdin, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, shell = shell,
+                               bufsize = PIPE_SIZE, encoding = 'utf-8', errors = 'replace', **kwargs)
+    if sys.version_info < (3, 10):
+        set_pipe_size(process.stdout)
+
+    if input is not None:
+        process.stdin.write(input)
+        process.stdin.close()
+
+    # Interactive runs see every line right away, otherwise we let sys.stdout buffer and flush now and then
+    interactive = echo and sys.stdout.isatty()
+    last_flush = time.monotonic()
+    output = [] if capture else None
+    for line in process.stdout:
+        if capture:
+            output.append(line)
+        if echo:
+            sys.stdout.write(line)
+            if interactive:
+                sys.stdout.flush()
+            elif time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                sys.stdout.flush()
+                last_flush = time.monotonic()
+    if echo:
+        sys.stdout.flush()
+
+    return process.wait(), ''.join(output) if capture else None
+
+def _format_args(args):
+    return args if isinstance(args, str) else ' '.join(args)
+
+# The output is only collected and returned when capture is set
+def call(args, failonerror = True, shell = False, input = None, capture = False):
+    print(_format_args(args))
+    if capture:
+        returncode, output = _run(args, shell = shell, input = input)
+    else:
+        # Nobody reads the output, so the child inherits our stdout and writes straight to the log
+        sys.stdout.flush()
+        args, kwargs = _spawn_args(args, shell)
+        returncode = subprocess.run(args, shell = shell, input = input, encoding = 'utf-8', **kwargs).returncode
+        output = None
+    if returncode != 0 and failonerror:
+        exit(1)
 
-    output = ''
-    while True:
-        line = process.stdout.readline().decode()
-        if line != '':
-            output += line
-            print(line.rstrip())
-        else:
-            break
+    return output
 
-    if process.wait() != 0 and failonerror:
+def call_parallel(commands, failonerror = True):
+    # Runs independent commands at the same time. To keep the log readable,
+    # the output of each command is printed in one go once it has finished
+    failed = False
+    with ThreadPoolExecutor(max_workers = len(commands)) as executor:
+        futures = {executor.submit(_run, args, echo = False): args for args in commands}
+        for future in as_completed(futures):
+            returncode, output = future.result()
+            print(_format_args(futures[future]))
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            failed = failed or returncode != 0
+
+    if failed and failonerror:
         exit(1)
 
-    return output
 
+@lru_cache(maxsize=1)
+def host_system():
+    return platform.system()
 
+@lru_cache(maxsize=1)
 def platform_from_host():
-    system = platform.system()
+    system = host_system()
     if system == "Linux":
         return "x86_64-linux"
     elif system == "Darwin":
@@ -52,18 +141,18 @@ def platform_from_host():
     else:
         return "x86_64-win32"
 
-def aptget(package):
-    call("sudo apt-get install -y --no-install-recommends " + package)
+def aptget(packages):
+    call(["sudo", "apt-get", "install", "-y", "--no-install-recommends"] + packages)
 
-def aptfast(package):
-    call("sudo apt-fast install -y --no-install-recommends " + package)
+def aptfast(packages):
+    call(["sudo", "apt-fast", "install", "-y", "--no-install-recommends"] + packages)
 
 def choco(package):
-    call("choco install " + package + " -y")
+    call(["choco", "install", package, "-y"])
 
 
 def mingwget(package):
-    call("mingw-get install " + package)
+    call(["mingw-get", "install", package])
 
 
 def setup_keychain(args):
@@ -74,37 +163,40 @@ def setup_keychain(args):
     # create new keychain
     print("Creating keychain")
     # call("security delete-keychain {}".format(keychain_name))
-    call("security create-keychain -p {} {}".format(keychain_pass, keychain_name))
+    call(["security", "create-keychain", "-p", keychain_pass, keychain_name])
 
     # set the new keychain as the default keychain
     print("Setting keychain as default")
-    call("security default-keychain -s {}".format(keychain_name))
+    call(["security", "default-keychain", "-s", keychain_name])
 
     # unlock the keychain
     print("Unlock keychain")
-    call("security unlock-keychain -p {} {}".format(keychain_pass, keychain_name))
+    call(["security", "unlock-keychain", "-p", keychain_pass, keychain_name])
 
     # decode and import cert to keychain
     print("Decoding certificate")
-    cert_path = os.path.join("ci", "cert.p12")
     cert_pass = args.keychain_cert_pass
-    with open(cert_path, "wb") as file:
-        file.write(base64.decodebytes(args.keychain_cert.encode()))
-    print("Importing certificate")
-    # -A = allow access to the keychain without warning (https://stackoverflow.com/a/19550453)
-    call("security import {} -k {} -P {} -A".format(cert_path, keychain_name, cert_pass))
-    os.remove(cert_path)
+    with tempfile.NamedTemporaryFile(suffix = ".p12", delete = False) as file:
+        file.write(base64.b64decode(args.keychain_cert))
+        cert_path = file.name
+    try:
+        print("Importing certificate")
+        # -A = allow access to the keychain without warning (https://stackoverflow.com/a/19550453)
+        call(["security", "import", cert_path, "-k", keychain_name, "-P", cert_pass, "-A"])
+    finally:
+        os.unlink(cert_path)
 
     # required since macOS Sierra https://stackoverflow.com/a/40039594
-    call("security set-key-partition-list -S apple-tool:,apple:,codesign: -s -k {} {}".format(keychain_pass, keychain_name))
+    call(["security", "set-key-partition-list", "-S", "apple-tool:,apple:,codesign:", "-s", "-k", keychain_pass, keychain_name])
     # prevent the keychain from auto-locking
-    call("security set-keychain-settings {}".format(keychain_name))
+    call(["security", "set-keychain-settings", keychain_name])
 
     # add the keychain to the keychain search list
-    call("security list-keychains -d user -s {}".format(keychain_name))
+    call(["security", "list-keychains", "-d", "user", "-s", keychain_name])
 
     print("Done with keychain setup")
 
+@lru_cache(maxsize=1)
 def get_github_token():
     return os.environ.get('SERVICES_GITHUB_TOKEN', None)
 
@@ -112,7 +204,7 @@ def setup_windows_cert(args):
     print("Setting up certificate")
     cert_path = os.path.abspath(os.path.join("ci", "windows_cert.pfx"))
     with open(cert_path, "wb") as file:
-        file.write(base64.decodebytes(args.windows_cert_b64.encode()))
+        file.write(base64.b64decode(args.windows_cert_b64))
     print("Wrote cert to", cert_path)
     cert_pass_path = os.path.abspath(os.path.join("ci", "windows_cert.pass"))
     with open(cert_pass_path, "wb") as file:
@@ -122,25 +214,27 @@ def setup_windows_cert(args):
 
 def install(args):
     # installed tools: https://github.com/actions/virtual-environments/blob/main/images/linux/Ubuntu2004-Readme.md
-    system = platform.system()
+    system = host_system()
     print("Installing dependencies for system '%s' " % (system))
     if system == "Linux":
         # we use apt-fast to speed up apt-get downloads
         # https://github.com/ilikenwf/apt-fast
-        call("sudo add-apt-repository ppa:apt-fast/stable")
-        call("sudo apt-get update", failonerror=False)
-        call("echo debconf apt-fast/maxdownloads string 16 | sudo debconf-set-selections")
-        call("echo debconf apt-fast/dlflag boolean true | sudo debconf-set-selections")
-        call("echo debconf apt-fast/aptmanager string apt-get | sudo debconf-set-selections")
-        call("sudo apt-get install -y apt-fast aria2")
-
-        call("sudo apt-get install -y software-properties-common")
+        call(["sudo", "add-apt-repository", "ppa:apt-fast/stable"])
+        call(["sudo", "apt-get", "update"], failonerror=False)
+        debconf_selections = [
+            "debconf apt-fast/maxdownloads string 16",
+            "debconf apt-fast/dlflag boolean true",
+            "debconf apt-fast/aptmanager string apt-get",
+        ]
+        call(["sudo", "debconf-set-selections"], input = "\n".join(debconf_selections) + "\n")
+        call(["sudo", "apt-get", "install", "-y", "apt-fast", "aria2", "software-properties-common"])
 
-        call("ls /usr/bin/clang*")
+        call("ls /usr/bin/clang*", shell=True)
 
-        call("sudo update-alternatives --remove-all clang")
-        call("sudo update-alternatives --remove-all clang++")
-        call("sudo update-alternatives --install /usr/bin/clang clang /usr/bin/clang-12 120 --slave /usr/bin/clang++ clang++ /usr/bin/clang++-12")
+        # One sudo for all three steps. The removals fail if clang isn't set up as an alternative yet, which is fine
+        call("sudo sh -c 'update-alternatives --remove-all clang 2>/dev/null; "
+             "update-alternatives --remove-all clang++ 2>/dev/null; "
+             "update-alternatives --install /usr/bin/clang clang /usr/bin/clang-12 120 --slave /usr/bin/clang++ clang++ /usr/bin/clang++-12'", shell=True)
 
         packages = [
             "libssl-dev",
@@ -161,7 +255,7 @@ def install(args):
             "lib32z1",
             "xvfb"
         ]
-        aptfast(" ".join(packages))
+        aptfast(packages)
 
     elif system == "Darwin":
         if args.keychain_cert:
@@ -175,11 +269,8 @@ def build_engine(platform, channel, with_valgrind = False, with_asan = False, wi
                 with_vanilla_lua = False, skip_tests = False, skip_build_tests = False, skip_codesign = True,
                 skip_docs = False, skip_builtins = False, archive = False):
 
-    install_sdk = ''
-    if not platform in ('x86_64-macos', 'arm64-macos', 'arm64-ios', 'x86_64-ios'):
-        install_sdk = 'install_sdk'
-
-    args = ('python scripts/build.py distclean %s install_ext' % install_sdk).split()
+    install_sdk = not platform in ('x86_64-macos', 'arm64-macos', 'arm64-ios', 'x86_64-ios')
+    args = ['python', 'scripts/build.py'] + setup_commands(platform, clean = True, install_sdk = install_sdk)
 
     opts = []
     waf_opts = []
@@ -219,11 +310,11 @@ def build_engine(platform, channel, with_valgrind = False, with_asan = False, wi
     if with_vanilla_lua:
         waf_opts.append('--use-vanilla-lua')
 
-    cmd = ' '.join(args + opts)
+    cmd = args + opts
 
     # Add arguments to waf after a double-dash
     if waf_opts:
-        cmd += ' -- ' + ' '.join(waf_opts)
+        cmd += ['--'] + waf_opts
 
     call(cmd)
 
@@ -243,11 +334,10 @@ def build_editor2(channel, engine_artifacts = None, skip_tests = False):
     if skip_tests:
         opts.append('--skip-tests')
 
-    opts_string = ' '.join(opts)
-
-    call('python scripts/build.py distclean install_ext build_editor2 --platform=%s %s' % (host_platform, opts_string))
-    for platform in PLATFORMS_DESKTOP:
-        call('python scripts/build.py bundle_editor2 --platform=%s %s' % (platform, opts_string))
+    # One build.py run builds the editor and bundles it for all desktop platforms
+    editor_platforms = ['--editor-platform=%s' % platform for platform in PLATFORMS_DESKTOP]
+    args = ['python', 'scripts/build.py'] + setup_commands(host_platform, clean = True) + ['build_editor2', 'bundle_editor2']
+    call(args + ['--platform=%s' % host_platform] + editor_platforms + opts)
 
 def download_editor2(channel, platform = None):
     host_platform = platform_from_host()
@@ -259,16 +349,18 @@ def download_editor2(channel, platform = None):
     opts = []
     opts.append('--channel=%s' % channel)
 
-    install_sdk = ''
-    if 'win32' in host_platform: # until we can find the signtool in a faster way on CI
-        install_sdk ='install_sdk'
-
+    # The packages are all extracted into the same folder, so we install them one platform at a time
     for platform in platforms:
-        call('python scripts/build.py %s install_ext download_editor2 --platform=%s %s' % (install_sdk, platform, ' '.join(opts)))
+        # until we can find the signtool in a faster way on CI
+        commands = setup_commands(platform, install_sdk = 'win32' in host_platform)
+        if commands:
+            call(['python', 'scripts/build.py'] + commands + ['--platform=%s' % platform])
+
+    call_parallel([['python', 'scripts/build.py', 'download_editor2', '--platform=%s' % platform] + opts for platform in platforms])
 
 
 def sign_editor2(platform, windows_cert = None, windows_cert_pass = None):
-    args = 'python scripts/build.py sign_editor2'.split()
+    args = ['python', 'scripts/build.py', 'sign_editor2']
     opts = []
 
     opts.append('--platform=%s' % platform)
@@ -285,8 +377,7 @@ def sign_editor2(platform, windows_cert = None, windows_cert_pass = None):
         windows_cert_pass = os.path.abspath(windows_cert_pass)
         opts.append("--windows-cert-pass=%s" % windows_cert_pass)
 
-    cmd = ' '.join(args + opts)
-    call(cmd)
+    call(args + opts)
 
 
 def notarize_editor2(notarization_username = None, notarization_password = None, notarization_itc_provider = None):
@@ -294,20 +385,18 @@ def notarize_editor2(notarization_username = None, notarization_password = None,
         print("No notarization username or password")
         exit(1)
 
-    # args = 'python scripts/build.py download_editor2 notarize_editor2 archive_editor2'.split()
-    args = 'python scripts/build.py notarize_editor2'.split()
+    args = ['python', 'scripts/build.py', 'notarize_editor2']
     opts = []
 
     opts.append('--platform=x86_64-macos')
 
-    opts.append('--notarization-username="%s"' % notarization_username)
-    opts.append('--notarization-password="%s"' % notarization_password)
+    opts.append('--notarization-username=%s' % notarization_username)
+    opts.append('--notarization-password=%s' % notarization_password)
 
     if notarization_itc_provider:
-        opts.append('--notarization-itc-provider="%s"' % notarization_itc_provider)
+        opts.append('--notarization-itc-provider=%s' % notarization_itc_provider)
 
-    cmd = ' '.join(args + opts)
-    call(cmd)
+    call(args + opts)
 
 
 def archive_editor2(channel, engine_artifacts = None, platform = None):
@@ -322,32 +411,68 @@ def archive_editor2(channel, engine_artifacts = None, platform = None):
     if engine_artifacts:
         opts.append('--engine-artifacts=%s' % engine_artifacts)
 
-    opts_string = ' '.join(opts)
+    # The packages are all extracted into the same folder, so we install them one platform at a time
     for platform in platforms:
-        call('python scripts/build.py install_ext archive_editor2 --platform=%s %s' % (platform, opts_string))
+        commands = setup_commands(platform)
+        if commands:
+            call(['python', 'scripts/build.py'] + commands + ['--platform=%s' % platform])
+
+    call_parallel([['python', 'scripts/build.py', 'archive_editor2', '--platform=%s' % platform] + opts for platform in platforms])
+
+# Unless --force-clean is used, we avoid repeating distclean and install_ext between chained commands
+force_clean = False
+tree_is_clean = False
+installed_ext = set() # platforms we've run install_ext for since the last distclean
+
+def setup_commands(platform = None, clean = False, install_sdk = False):
+    # The distclean, install_sdk and install_ext commands to put first on a build.py
+    # command line, leaving out the ones an earlier command in this run already did
+    global tree_is_clean
+    commands = []
+    if clean and (force_clean or not tree_is_clean):
+        commands.append('distclean')
+        installed_ext.clear() # distclean removes the extracted packages
+    if install_sdk:
+        commands.append('install_sdk')
+    if force_clean or platform not in installed_ext:
+        commands.append('install_ext')
+        installed_ext.add(platform)
+    tree_is_clean = False # the commands that follow build in the tree
+    return commands
 
 def distclean():
-    call("python scripts/build.py distclean")
+    global tree_is_clean
+    if tree_is_clean and not force_clean:
+        print("Skipping distclean, the tree is already clean")
+        return
+
+    call(['python', 'scripts/build.py', 'distclean'])
+    tree_is_clean = True
+    installed_ext.clear() # distclean removes the extracted packages
 
 
 def install_ext(platform = None):
+    if platform in installed_ext and not force_clean:
+        print("Skipping install_ext, already installed for platform '%s'" % (platform or "host"))
+        return
+
     opts = []
     if platform:
         opts.append('--platform=%s' % platform)
 
-    call("python scripts/build.py install_ext %s" % ' '.join(opts))
+    call(['python', 'scripts/build.py', 'install_ext'] + opts)
+    installed_ext.add(platform)
 
 def build_bob(channel, branch = None):
-    args = "python scripts/build.py install_ext sync_archive build_bob archive_bob".split()
+    args = ['python', 'scripts/build.py'] + setup_commands() + ['sync_archive', 'build_bob', 'archive_bob']
     opts = []
     opts.append("--channel=%s" % channel)
 
-    cmd = ' '.join(args + opts)
-    call(cmd)
+    call(args + opts)
 
 
 def release(channel):
-    args = "python scripts/build.py install_ext release".split()
+    args = ['python', 'scripts/build.py'] + setup_commands() + ['release']
     opts = []
     opts.append("--channel=%s" % channel)
 
@@ -355,23 +480,22 @@ def release(channel):
     if token:
         opts.append("--github-token=%s" % token)
 
-    cmd = ' '.join(args + opts)
-    call(cmd)
+    call(args + opts)
 
 def build_sdk(channel):
-    args = "python scripts/build.py install_ext build_sdk".split()
+    args = ['python', 'scripts/build.py'] + setup_commands() + ['build_sdk']
     opts = []
     opts.append("--channel=%s" % channel)
 
-    cmd = ' '.join(args + opts)
-    call(cmd)
+    call(args + opts)
 
 
 def smoke_test():
-    call('python scripts/build.py distclean install_ext smoke_test')
+    call(['python', 'scripts/build.py'] + setup_commands(clean = True) + ['smoke_test'])
 
 
 
+@lru_cache(maxsize=1)
 def get_branch():
     # The name of the head branch. Only set for pull request events.
     branch = os.environ.get('GITHUB_HEAD_REF', '')
@@ -380,10 +504,16 @@ def get_branch():
         branch = os.environ.get('GITHUB_REF_NAME', '')
 
     if branch == '':
-        # https://stackoverflow.com/a/55276236/1266551
-        branch = call("git rev-parse --abbrev-ref HEAD").strip()
-        if branch == "HEAD":
-            branch = call("git rev-parse HEAD")
+        # .git/HEAD holds either a reference to the current branch or, when detached, the commit sha
+        try:
+            with open(os.path.join(".git", "HEAD")) as f:
+                head = f.read().strip()
+            branch = head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else head
+        except OSError: # not at the root of a regular checkout (e.g. a worktree, where .git is a file)
+            # https://stackoverflow.com/a/55276236/1266551
+            branch = call(["git", "rev-parse", "--abbrev-ref", "HEAD"], capture = True).strip()
+            if branch == "HEAD":
+                branch = call(["git", "rev-parse", "HEAD"], capture = True).strip()
 
     return branch
 
@@ -391,6 +521,7 @@ def get_pull_request_target_branch():
     # The name of the base (or target) branch. Only set for pull request events.
     return os.environ.get('GITHUB_BASE_REF', '')
 
+@lru_cache(maxsize=1)
 def is_workflow_enabled_in_repo():
     if not is_repo_private():
         return True # all workflows are enabled by default
@@ -400,6 +531,18 @@ def is_workflow_enabled_in_repo():
         return True
     return False
 
+# branch: (engine_channel, editor_channel, release_channel, make_release, default engine_artifacts)
+BRANCH_CONFIG = {
+    "master":       ("stable", "editor-alpha", "stable",       True, "archived"),
+    "beta":         ("beta",   "beta",         "beta",         True, "archived"),
+    "dev":          ("alpha",  "alpha",        "alpha",        True, "archived"),
+    "editor-dev":   (None,     "editor-alpha", "editor-alpha", True, None),
+}
+# DEFEDIT-* branches and pull requests targeting editor-dev
+EDITOR_DEV_BRANCH_CONFIG = (None, "editor-dev", None, False, "archived-stable")
+# engine dev branches
+DEV_BRANCH_CONFIG = ("dev", "dev", None, False, "archived")
+
 def main(argv):
     if not is_workflow_enabled_in_repo():
         print("Workflow '{}' is disabled in repo '{}'. Skipping".format(os.environ.get('GITHUB_WORKFLOW', ''), os.environ.get('GITHUB_REPOSITORY', '')))
@@ -430,9 +573,13 @@ def main(argv):
     parser.add_argument('--github-token', dest='github_token', help='GitHub authentication token when releasing to GitHub')
     parser.add_argument('--github-target-repo', dest='github_target_repo', help='GitHub target repo when releasing artefacts')
     parser.add_argument('--github-sha1', dest='github_sha1', help='A specific sha1 to use in github operations')
+    parser.add_argument('--force-clean', dest='force_clean', action='store_true', help='Always run distclean and install_ext, even if an earlier command already did')
 
     args = parser.parse_args()
 
+    global force_clean
+    force_clean = args.force_clean
+
     platform = args.platform
 
     if platform and not is_platform_supported(platform):
@@ -449,41 +596,15 @@ def main(argv):
     branch = get_branch()
 
     # configure build flags based on the branch
-    release_channel = None
     skip_editor_tests = False
-    make_release = False
-    if branch == "master":
-        engine_channel = "stable"
-        editor_channel = "editor-alpha"
-        release_channel = "stable"
-        make_release = True
-        engine_artifacts = args.engine_artifacts or "archived"
-    elif branch == "beta":
-        engine_channel = "beta"
-        editor_channel = "beta"
-        release_channel = "beta"
-        make_release = True
-        engine_artifacts = args.engine_artifacts or "archived"
-    elif branch == "dev":
-        engine_channel = "alpha"
-        editor_channel = "alpha"
-        release_channel = "alpha"
-        make_release = True
-        engine_artifacts = args.engine_artifacts or "archived"
-    elif branch == "editor-dev":
-        engine_channel = None
-        editor_channel = "editor-alpha"
-        release_channel = "editor-alpha"
-        make_release = True
-        engine_artifacts = args.engine_artifacts
-    elif branch and (branch.startswith("DEFEDIT-") or get_pull_request_target_branch() == "editor-dev"):
-        engine_channel = None
-        editor_channel = "editor-dev"
-        engine_artifacts = args.engine_artifacts or "archived-stable"
-    else: # engine dev branch
-        engine_channel = "dev"
-        editor_channel = "dev"
-        engine_artifacts = args.engine_artifacts or "archived"
+    config = BRANCH_CONFIG.get(branch)
+    if config is None:
+        if branch and (branch.startswith("DEFEDIT-") or get_pull_request_target_branch() == "editor-dev"):
+            config = EDITOR_DEV_BRANCH_CONFIG
+        else: # engine dev branch
+            config = DEV_BRANCH_CONFIG
+    engine_channel, editor_channel, release_channel, make_release, engine_artifacts = config
+    engine_artifacts = args.engine_artifacts or engine_artifacts
 
     print("Using branch={} engine_channel={} editor_channel={} engine_artifacts={}".format(branch, engine_channel, editor_channel, engine_artifacts))
 
@@ -23,13 +23,18 @@ import optparse
 import re
 import shutil
 import subprocess
+import tempfile
 import zipfile
 import configparser
 import datetime
-import imp
+import hashlib
+import io
+import multiprocessing
 import fnmatch
 import urllib
 import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 # TODO: collect common functions in a more suitable reusable module
 try:
@@ -47,6 +52,7 @@ finally:
 
 # defold/build_tools
 import run
+import http_cache
 
 
 DEFAULT_ARCHIVE_DOMAIN=os.environ.get("DM_ARCHIVE_DOMAIN", "d.defold.com")
@@ -78,6 +84,17 @@ def mkdirs(path):
 def extract_tar(file, path):
     run.command(['tar', '-C', path, '-xzf', file])
 
+def zip_member_path(path, name):
+    # Like ZipFile.extract, we don't let the entries end up outside of the path
+    parts = [part for part in name.split('/') if part not in ('', '.', '..')]
+    return os.path.join(path, *parts)
+
+def extract_zip_files(file, files):
+    with zipfile.ZipFile(file, 'r') as zf:
+        for info, target in files:
+            with zf.open(info) as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
 def extract_zip(file, path, is_mac):
     if is_mac:
         # We use the system unzip command for macOS because zip (and
@@ -87,7 +104,17 @@ def extract_zip(file, path, is_mac):
         run.command(['unzip', file, '-d', path])
     else:
         with zipfile.ZipFile(file, 'r') as zf:
-            zf.extractall(path)
+            members = [(info, zip_member_path(path, info.filename)) for info in zf.infolist()]
+            # create all directories up front, instead of checking for them per file
+            dirs = set(target if info.is_dir() else os.path.dirname(target) for info, target in members)
+            for dir in sorted(dirs):
+                mkdirs(dir)
+
+        # the files are extracted by several threads, each with a ZipFile of its own
+        files = [(info, target) for info, target in members if not info.is_dir()]
+        workers = max(1, min(os.cpu_count() or 1, len(files)))
+        with ThreadPoolExecutor(max_workers = workers) as executor:
+            list(executor.map(lambda batch: extract_zip_files(file, batch), [files[i::workers] for i in range(workers)]))
 
 def extract(file, path, is_mac):
     print('Extracting %s to %s' % (file, path))
@@ -99,30 +126,60 @@ def extract(file, path, is_mac):
     else:
         assert False, "Don't know how to extract " + file
 
-modules = {}
-
 def download(url):
-    if not modules.__contains__('http_cache'):
-        modules['http_cache'] = imp.load_source('http_cache', os.path.join('..', 'build_tools', 'http_cache.py'))
     log('Downloading %s' % (url))
-    path = modules['http_cache'].download(url, lambda count, total: log('Downloading %s %.2f%%' % (url, 100 * count / float(total))))
+    path = http_cache.download(url, lambda count, total: log('Downloading %s %.2f%%' % (url, 100 * count / float(total))))
     if not path:
         log('Downloading %s failed' % (url))
     return path
 
+def walk_files(root_dir):
+    # Like os.walk, but yields a DirEntry for each file. The entries know if they
+    # are directories without an extra stat
+    dirs = [root_dir]
+    while dirs:
+        try:
+            it = os.scandir(dirs.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.is_symlink(): # os.walk doesn't follow directory links either
+                        dirs.append(entry.path)
+                else:
+                    yield entry
+
 def ziptree(path, outfile, directory = None):
     # Directory is similar to -C in tar
 
-    zip = zipfile.ZipFile(outfile, 'w')
-    for root, dirs, files in os.walk(path):
-        for f in files:
-            p = os.path.join(root, f)
-            an = p
+    # The bundles mostly consist of already compressed files (jars, jmods), so the entries
+    # are stored without compression. If available, we let the zip tool do the work since it
+    # doesn't have the per file overhead of zipfile. Both ways add the same files: the content of
+    # linked files is stored, links to directories are skipped and there are no directory entries
+    zip_tool = shutil.which('zip')
+    if zip_tool:
+        if os.path.exists(outfile):
+            os.remove(outfile)
+        cwd = directory or '.'
+        # zip -r would descend into the linked directories, so it gets the list of files instead
+        with tempfile.TemporaryFile('w+') as names:
+            for entry in walk_files(path):
+                names.write(os.path.relpath(entry.path, cwd) + '\n')
+            names.seek(0)
+            run.command([zip_tool, '-q', '-0', '-D', '-@', os.path.abspath(outfile)], cwd = cwd, stdin = names)
+        return outfile
+
+    with zipfile.ZipFile(outfile, 'w', zipfile.ZIP_STORED, allowZip64 = True) as zip:
+        for entry in walk_files(path):
+            an = entry.path
             if directory:
-                an = os.path.relpath(p, directory)
-            zip.write(p, an)
+                an = os.path.relpath(entry.path, directory)
+            # ZipFile.write copies in 8 KB chunks, which is slow for the large jars and jmods
+            info = zipfile.ZipInfo.from_file(entry.path, an)
+            with open(entry.path, 'rb') as src, zip.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
 
-    zip.close()
     return outfile
 
 def _get_tag_name(version, channel): # from build.py
@@ -171,13 +228,15 @@ def rmtree(path):
     if os.path.exists(path):
         shutil.rmtree(path, onerror=remove_readonly_retry)
 
+@lru_cache(maxsize=None)
 def mac_certificate(codesigning_identity):
     if run.command(['security', 'find-identity', '-p', 'codesigning', '-v']).find(codesigning_identity) >= 0:
         return codesigning_identity
     else:
         return None
 
-def sign_files(platform, options, dir):
+def sign_files(platform, options, files):
+    # Signs all files with a single call to the signing tool
     if options.skip_codesign:
         return
     if 'win32' in platform:
@@ -206,8 +265,7 @@ def sign_files(platform, options, dir):
             '/a',
             '/f', certificate,
             '/p', certificate_pass,
-            '/tr', 'http://timestamp.digicert.com',
-            dir])
+            '/tr', 'http://timestamp.digicert.com'] + files)
     elif 'macos' in platform:
         codesigning_identity = options.codesigning_identity
         certificate = mac_certificate(codesigning_identity)
@@ -221,8 +279,7 @@ def sign_files(platform, options, dir):
             '--force',
             '--options', 'runtime',
             '--entitlements', './scripts/entitlements.plist',
-            '-s', certificate,
-            dir])
+            '-s', certificate] + files)
 
 def launcher_path(options, platform, exe_suffix):
     if options.launcher:
@@ -247,6 +304,7 @@ def full_jdk_url(jdk_platform):
 def full_build_jdk_url():
     return full_jdk_url(python_platform_to_java[sys.platform])
 
+@lru_cache(maxsize=None)
 def download_build_jdk():
     print('Downloading build jdk')
     jdk_url = full_build_jdk_url()
@@ -256,29 +314,51 @@ def download_build_jdk():
         sys.exit(5)
     return jdk
 
+def file_sha256(file):
+    sha256 = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+@lru_cache(maxsize=None)
 def extract_build_jdk(build_jdk):
-    print('Extracting build jdk')
-    rmtree('build/jdk')
-    mkdirs('build/jdk')
-    is_mac = sys.platform == 'darwin'
-    extract(build_jdk, 'build/jdk', is_mac)
-    if is_mac:
-        return 'build/jdk/jdk-%s/Contents/Home' % java_version
+    # The jdk is extracted into a folder named after the archive's hash, and
+    # is reused for as long as the archive doesn't change
+    jdk_dir = 'build/jdk/%s' % file_sha256(build_jdk)[:16]
+    stamp = os.path.join(jdk_dir, '.extracted')
+    if os.path.exists(stamp):
+        print('Using extracted build jdk in %s' % jdk_dir)
+    else:
+        print('Extracting build jdk')
+        rmtree('build/jdk')
+        mkdirs(jdk_dir)
+        extract(build_jdk, jdk_dir, sys.platform == 'darwin')
+        open(stamp, 'w').close()
+
+    if sys.platform == 'darwin':
+        return '%s/jdk-%s/Contents/Home' % (jdk_dir, java_version)
     else:
-        return 'build/jdk/jdk-%s' % java_version
+        return '%s/jdk-%s' % (jdk_dir, java_version)
 
-def check_reflections(java_cmd_env):
-    reflection_prefix = 'Reflection warning, ' # final space important
-    included_reflections = ['editor/', 'util/'] # [] = include all
-    ignored_reflections = []
+reflection_warning_re = re.compile('Reflection warning, (.*)') # final space important
+included_reflections = [re.compile(p) for p in ['editor/', 'util/']] # [] = include all
+ignored_reflections = [re.compile(p) for p in []]
 
+def check_reflections(java_cmd_env):
     # lein check puts reflection warnings on stderr, redirect to stdout to capture all output
     output = run.command(['env', java_cmd_env, 'bash', './scripts/lein', 'with-profile', '+headless', 'check-and-exit'])
-    lines = output.splitlines()
-    reflection_lines = (line for line in lines if re.match(reflection_prefix, line))
-    reflections = (re.match('(' + reflection_prefix + ')(.*)', line).group(2) for line in reflection_lines)
-    filtered_reflections = reflections if not included_reflections else (line for line in reflections if any((re.match(include, line) for include in included_reflections)))
-    failures = list(line for line in filtered_reflections if not any((re.match(ignored, line) for ignored in ignored_reflections)))
+    failures = []
+    for line in output.splitlines():
+        m = reflection_warning_re.match(line)
+        if not m:
+            continue
+        reflection = m.group(1)
+        if included_reflections and not any(include.match(reflection) for include in included_reflections):
+            continue
+        if any(ignored.match(reflection) for ignored in ignored_reflections):
+            continue
+        failures.append(reflection)
 
     if failures:
         for failure in failures:
@@ -316,14 +396,72 @@ def get_exe_suffix(platform):
     return ".exe" if 'win32' in platform else ""
 
 
-def remove_platform_files_from_archive(platform, jar):
-    zin = zipfile.ZipFile(jar, 'r')
-    files = zin.namelist()
-    files_to_remove = []
+def remove_files_from_zip(zf, files_to_remove):
+    # The entries are removed in place, without decompressing anything: the local records
+    # of the kept entries are moved down over the removed ones, and zipfile writes a new
+    # central directory for the kept entries when the (appendable) archive is closed
+    entries = sorted(zf.infolist(), key = lambda info: info.header_offset)
+    ends = [info.header_offset for info in entries[1:]] + [zf.start_dir]
+    offset = None # where to move the next kept record, once something has been removed
+    for info, end in zip(entries, ends):
+        if info.filename in files_to_remove:
+            if offset is None:
+                offset = info.header_offset
+            continue
+        if offset is None:
+            continue
+        start = info.header_offset
+        info.header_offset = offset
+        while start < end:
+            zf.fp.seek(start)
+            data = zf.fp.read(min(1024 * 1024, end - start))
+            zf.fp.seek(offset)
+            zf.fp.write(data)
+            start += len(data)
+            offset += len(data)
+
+    if offset is None:
+        return # nothing removed
+    zf.filelist = [info for info in zf.filelist if info.filename not in files_to_remove]
+    zf.NameToInfo = {info.filename: info for info in zf.filelist}
+    zf.start_dir = offset
+    zf._didModify = True # makes close() write the central directory and truncate the file
+
+def is_zip_without_files(file, kept_files):
+    # The in place removal depends on zipfile internals, so we check that the result
+    # is a valid archive with exactly the entries we kept
+    try:
+        with zipfile.ZipFile(file, 'r') as zf:
+            return zf.testzip() is None and sorted(zf.namelist()) == kept_files
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+def copy_zip_without_files(src, dst, files_to_remove):
+    # the old way of removing the files: stream the kept entries into a new archive
+    with zipfile.ZipFile(src, 'r') as zin, zipfile.ZipFile(dst, 'w', zipfile.ZIP_DEFLATED, allowZip64 = True) as zout:
+        for info in zin.infolist():
+            if info.filename in files_to_remove:
+                continue
+            if info.is_dir():
+                zout.writestr(info, b'')
+                continue
+            with zin.open(info) as f, zout.open(info, 'w') as out:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+
+# the libraries in the root of the editor jar that aren't used on a platform
+platform_other_lib_suffixes = {'x86_64-macos': ('.so', '.dll'),
+                               'x86_64-win32': ('.so', '.dylib'),
+                               'x86_64-linux': ('.dll', '.dylib')}
+
+def remove_platform_files_from_archive(platform, jar, original_jar):
+    # jar is a copy of original_jar, which is left untouched
+    zf = zipfile.ZipFile(jar, 'a')
+    files_to_remove = set()
 
-    # find files to remove from libexec/*
     libexec_platform = "libexec/" + platform
-    for file in files:
+    other_lib_suffixes = platform_other_lib_suffixes.get(platform, ())
+    for file in zf.namelist():
+        # find files to remove from libexec/*
         if file.startswith("libexec"):
             # don't remove any folders
             if file.endswith("/"):
@@ -338,129 +476,180 @@ def remove_platform_files_from_archive(platform, jar):
             if "bundletool-all.jar" in file:
                 continue
             # anything else should be removed
-            files_to_remove.append(file)
-
-    # find libs to remove in the root folder
-    for file in files:
-        if "/" not in file:
-            if platform == "x86_64-macos" and (file.endswith(".so") or file.endswith(".dll")):
-                files_to_remove.append(file)
-            elif platform == "x86_64-win32" and (file.endswith(".so") or file.endswith(".dylib")):
-                files_to_remove.append(file)
-            elif platform == "x86_64-linux" and (file.endswith(".dll") or file.endswith(".dylib")):
-                files_to_remove.append(file)
-
-    # write new jar without the files that should be removed
-    newjar = jar + "_new"
-    zout = zipfile.ZipFile(newjar, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
-    for file in zin.infolist():
-        if file.filename not in files_to_remove:
-            zout.writestr(file, zin.read(file))
-    zout.close()
-    zin.close()
-
-    # switch to jar without removed files
-    os.remove(jar)
-    os.rename(newjar, jar)
+            files_to_remove.add(file)
+        # find libs to remove in the root folder
+        elif "/" not in file and file.endswith(other_lib_suffixes):
+            files_to_remove.add(file)
 
+    kept_files = sorted(file for file in zf.namelist() if file not in files_to_remove)
+    try:
+        remove_files_from_zip(zf, files_to_remove)
+    except AttributeError:
+        pass # the zipfile internals have changed, the check below makes us copy the files instead
+    zf.close()
+
+    if not is_zip_without_files(jar, kept_files):
+        print("Removing the platform files in place from %s failed, copying the kept files instead" % jar)
+        copy_zip_without_files(original_jar, jar, files_to_remove)
+
+
+def link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def jlink_platform_jdk(platform, jdk, tmp_dir, is_mac, extracted_build_jdk):
+    # The runtime generated by jlink only depends on the platform jdk, the build jdk whose jlink
+    # makes it and the jlink options, so it's kept in a folder named after them and reused for as
+    # long as they don't change. The extracted build jdk's path contains the hash of its archive
+    platform_dir = 'build/jlink/%s' % platform
+    key = (file_sha256(jdk)[:16],
+           hashlib.sha256(extracted_build_jdk.encode('utf-8')).hexdigest()[:8],
+           file_sha256('jlink-options')[:8])
+    jlink_dir = '%s/%s' % (platform_dir, '-'.join(key))
+    if os.path.exists(jlink_dir):
+        print('Using jlink output in %s' % jlink_dir)
+        return jlink_dir
+
+    extract(jdk, tmp_dir, is_mac)
+
+    if is_mac:
+        platform_jdk = '%s/jdk-%s/Contents/Home' % (tmp_dir, java_version)
+    else:
+        platform_jdk = '%s/jdk-%s' % (tmp_dir, java_version)
+
+    # use jlink to generate a custom Java runtime to bundle with the editor
+    output_dir = jlink_dir + '_tmp'
+    # the platforms are bundled by several processes at once, which may all create build/jlink
+    os.makedirs(platform_dir, exist_ok = True)
+    # the runtimes made from other jdks won't be used again (and an unfinished output is removed)
+    for entry in os.listdir(platform_dir):
+        rmtree(os.path.join(platform_dir, entry))
+    run.command(['%s/bin/jlink' % extracted_build_jdk,
+                  '@jlink-options',
+                  '--module-path=%s/jmods' % platform_jdk,
+                  '--output=%s' % output_dir])
+    os.rename(output_dir, jlink_dir) # only complete outputs are reused
+    return jlink_dir
+
+def create_editor_config(options):
+    # the editor config file is the same for all platforms
+    config = configparser.ConfigParser()
+    config.read('bundle-resources/config')
+    config.set('build', 'editor_sha1', options.editor_sha1)
+    config.set('build', 'engine_sha1', options.engine_sha1)
+    config.set('build', 'version', options.version)
+    config.set('build', 'time', datetime.datetime.now().isoformat())
+    config.set('build', 'archive_domain', options.archive_domain)
+
+    if options.channel:
+        config.set('build', 'channel', options.channel)
+
+    f = io.StringIO()
+    config.write(f)
+    return f.getvalue()
+
+def create_platform_bundle(options, platform, config, jar_file, extracted_build_jdk, jdk, launcher):
+    print("Creating bundle for platform %s" % platform)
+
+    # each platform gets its own tmp dir, so that the platforms can be bundled at the same time
+    tmp_dir = "tmp-%s" % platform
+    rmtree(tmp_dir)
+
+    is_mac = 'macos' in platform
+    if is_mac:
+        resources_dir = os.path.join(tmp_dir, 'Defold.app/Contents/Resources')
+        packages_dir = os.path.join(tmp_dir, 'Defold.app/Contents/Resources/packages')
+        bundle_dir = os.path.join(tmp_dir, 'Defold.app')
+        exe_dir = os.path.join(tmp_dir, 'Defold.app/Contents/MacOS')
+        icon = 'logo.icns'
+    else:
+        resources_dir = os.path.join(tmp_dir, 'Defold')
+        packages_dir = os.path.join(tmp_dir, 'Defold/packages')
+        bundle_dir = os.path.join(tmp_dir, 'Defold')
+        exe_dir = os.path.join(tmp_dir, 'Defold')
+        icon = None
+
+    mkdirs(tmp_dir)
+    mkdirs(bundle_dir)
+    mkdirs(exe_dir)
+    mkdirs(resources_dir)
+    mkdirs(packages_dir)
+
+    if is_mac:
+        shutil.copy('bundle-resources/Info.plist', '%s/Contents' % bundle_dir)
+        shutil.copy('bundle-resources/Assets.car', resources_dir)
+        shutil.copy('bundle-resources/document_legacy.icns', resources_dir)
+    if icon:
+        shutil.copy('bundle-resources/%s' % icon, resources_dir)
+
+    with open('%s/config' % resources_dir, 'w') as f:
+        f.write(config)
+
+    defold_jar = '%s/defold-%s.jar' % (packages_dir, options.editor_sha1)
+    # A copy of its own (not a link), since the platform files are stripped from it in place.
+    # copyfile skips copying the file stat, and lets the OS copy the data (sendfile, fcopyfile)
+    shutil.copyfile(jar_file, defold_jar)
+
+    # strip tools and libs for the platforms we're not currently bundling
+    remove_platform_files_from_archive(platform, defold_jar, jar_file)
+
+    # copy editor executable (the launcher)
+    defold_exe = '%s/Defold%s' % (exe_dir, get_exe_suffix(platform))
+    shutil.copyfile(launcher, defold_exe)
+    if not 'win32' in platform:
+        run.command(['chmod', '+x', defold_exe])
+
+    # the custom Java runtime to bundle with the editor
+    packages_jdk = '%s/jdk-%s' % (packages_dir, java_version)
+    shutil.copytree(jlink_platform_jdk(platform, jdk, tmp_dir, is_mac, extracted_build_jdk), packages_jdk, copy_function = link_or_copy)
+
+    # create final zip file
+    zipfile = 'target/editor/Defold-%s.zip' % platform
+    if os.path.exists(zipfile):
+        os.remove(zipfile)
+
+    print("Creating '%s' bundle from '%s'" % (zipfile, bundle_dir))
+    ziptree(bundle_dir, zipfile, tmp_dir)
+
+
+def download_platform_files(options, platform, build_jdk):
+    jdk_url = full_jdk_url(platform_to_java[platform])
+    if jdk_url == full_build_jdk_url():
+        jdk = build_jdk
+    else:
+        jdk = download(jdk_url)
+        if not jdk:
+            print('Failed to download %s' % jdk_url)
+            sys.exit(5)
+    launcher = launcher_path(options, platform, get_exe_suffix(platform))
+    return jdk, launcher
 
 def create_bundle(options):
     jar_file = 'target/defold-editor-2.0.0-SNAPSHOT-standalone.jar'
     build_jdk = download_build_jdk()
-    extracted_build_jdk = extract_build_jdk(build_jdk)
+    config = create_editor_config(options)
 
     mkdirs('target/editor')
-    for platform in options.target_platform:
-        print("Creating bundle for platform %s" % platform)
-        rmtree('tmp')
-
-        jdk_url = full_jdk_url(platform_to_java[platform])
-        if jdk_url == full_build_jdk_url():
-            jdk = build_jdk
-        else:
-            jdk = download(jdk_url)
-            if not jdk:
-                print('Failed to download %s' % jdk_url)
-                sys.exit(5)
-
-        tmp_dir = "tmp"
-
-        is_mac = 'macos' in platform
-        if is_mac:
-            resources_dir = os.path.join(tmp_dir, 'Defold.app/Contents/Resources')
-            packages_dir = os.path.join(tmp_dir, 'Defold.app/Contents/Resources/packages')
-            bundle_dir = os.path.join(tmp_dir, 'Defold.app')
-            exe_dir = os.path.join(tmp_dir, 'Defold.app/Contents/MacOS')
-            icon = 'logo.icns'
-        else:
-            resources_dir = os.path.join(tmp_dir, 'Defold')
-            packages_dir = os.path.join(tmp_dir, 'Defold/packages')
-            bundle_dir = os.path.join(tmp_dir, 'Defold')
-            exe_dir = os.path.join(tmp_dir, 'Defold')
-            icon = None
-
-        mkdirs(tmp_dir)
-        mkdirs(bundle_dir)
-        mkdirs(exe_dir)
-        mkdirs(resources_dir)
-        mkdirs(packages_dir)
-
-        if is_mac:
-            shutil.copy('bundle-resources/Info.plist', '%s/Contents' % bundle_dir)
-            shutil.copy('bundle-resources/Assets.car', resources_dir)
-            shutil.copy('bundle-resources/document_legacy.icns', resources_dir)
-        if icon:
-            shutil.copy('bundle-resources/%s' % icon, resources_dir)
-
-        # creating editor config file
-        config = configparser.ConfigParser()
-        config.read('bundle-resources/config')
-        config.set('build', 'editor_sha1', options.editor_sha1)
-        config.set('build', 'engine_sha1', options.engine_sha1)
-        config.set('build', 'version', options.version)
-        config.set('build', 'time', datetime.datetime.now().isoformat())
-        config.set('build', 'archive_domain', options.archive_domain)
-
-        if options.channel:
-            config.set('build', 'channel', options.channel)
-
-        with open('%s/config' % resources_dir, 'w') as f:
-            config.write(f)
-
-        defold_jar = '%s/defold-%s.jar' % (packages_dir, options.editor_sha1)
-        shutil.copy(jar_file, defold_jar)
-
-        # strip tools and libs for the platforms we're not currently bundling
-        remove_platform_files_from_archive(platform, defold_jar)
-
-        # copy editor executable (the launcher)
-        launcher = launcher_path(options, platform, get_exe_suffix(platform))
-        defold_exe = '%s/Defold%s' % (exe_dir, get_exe_suffix(platform))
-        shutil.copy(launcher, defold_exe)
-        if not 'win32' in platform:
-            run.command(['chmod', '+x', defold_exe])
-
-        extract(jdk, tmp_dir, is_mac)
-
-        if is_mac:
-            platform_jdk = '%s/jdk-%s/Contents/Home' % (tmp_dir, java_version)
-        else:
-            platform_jdk = '%s/jdk-%s' % (tmp_dir, java_version)
-
-        # use jlink to generate a custom Java runtime to bundle with the editor
-        packages_jdk = '%s/jdk-%s' % (packages_dir, java_version)
-        run.command(['%s/bin/jlink' % extracted_build_jdk,
-                      '@jlink-options',
-                      '--module-path=%s/jmods' % platform_jdk,
-                      '--output=%s' % packages_jdk])
-
-        # create final zip file
-        zipfile = 'target/editor/Defold-%s.zip' % platform
-        if os.path.exists(zipfile):
-            os.remove(zipfile)
 
-        print("Creating '%s' bundle from '%s'" % (zipfile, bundle_dir))
-        ziptree(bundle_dir, zipfile, tmp_dir)
+    # The platform files are downloaded in parallel while we extract the build jdk, and each platform
+    # is bundled in a process of its own as soon as its files are downloaded. The download threads share
+    # the http cache, which locks its index, but it isn't safe to use from several processes, so all
+    # downloads happen in this one. The processes are spawned rather than forked, since there are
+    # download threads running when they start
+    platforms = options.target_platform
+    with ThreadPoolExecutor(max_workers = len(platforms)) as download_executor, \
+         ProcessPoolExecutor(max_workers = len(platforms), mp_context = multiprocessing.get_context('spawn')) as bundle_executor:
+        downloads = {download_executor.submit(download_platform_files, options, platform, build_jdk): platform for platform in platforms}
+        extracted_build_jdk = extract_build_jdk(build_jdk)
+
+        bundles = []
+        for future in as_completed(downloads):
+            jdk, launcher = future.result()
+            bundles.append(bundle_executor.submit(create_platform_bundle, options, downloads[future], config, jar_file, extracted_build_jdk, jdk, launcher))
+        for future in bundles:
+            future.result()
 
 
 def sign(options):
@@ -493,14 +682,18 @@ def sign(options):
             # the *.app will not process files in Resources
             jdk_dir = "jdk-%s" % (java_version)
             jdk_path = os.path.join(sign_dir, "Defold.app", "Contents", "Resources", "packages", jdk_dir)
-            for exe in find_files(os.path.join(jdk_path, "bin"), "*"):
-                sign_files('macos', options, exe)
-            for lib in find_files(os.path.join(jdk_path, "lib"), "*.dylib"):
-                sign_files('macos', options, lib)
-            sign_files('macos', options, os.path.join(jdk_path, "lib", "jspawnhelper"))
-            sign_files('macos', options, os.path.join(sign_dir, "Defold.app"))
+            jdk_files = find_files(os.path.join(jdk_path, "bin"), "*")
+            jdk_files += find_files(os.path.join(jdk_path, "lib"), "*.dylib")
+            jdk_files.append(os.path.join(jdk_path, "lib", "jspawnhelper"))
+            # codesign works through the files one at a time, so we split them into batches signed in parallel
+            workers = min(os.cpu_count() or 1, len(jdk_files))
+            batches = [jdk_files[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers = workers) as executor:
+                list(executor.map(lambda batch: sign_files('macos', options, batch), batches))
+            # the app itself is signed last, after its content
+            sign_files('macos', options, [os.path.join(sign_dir, "Defold.app")])
         elif 'win32' in platform:
-            sign_files('win32', options, os.path.join(sign_dir, "Defold", "Defold.exe"))
+            sign_files('win32', options, [os.path.join(sign_dir, "Defold", "Defold.exe")])
 
         # create editor bundle with signed files
         os.remove(bundle_file)
@@ -510,13 +703,8 @@ def sign(options):
 
 
 def find_files(root_dir, file_pattern):
-    matches = []
-    for root, dirnames, filenames in os.walk(root_dir):
-        for filename in filenames:
-            fullname = os.path.join(root, filename)
-            if fnmatch.fnmatch(filename, file_pattern):
-                matches.append(fullname)
-    return matches
+    match = re.compile(fnmatch.translate(file_pattern)).match
+    return [entry.path for entry in walk_files(root_dir) if match(entry.name)]
 
 def create_dmg(options):
     print("Creating .dmg from file in '%s'" % options.bundle_dir)
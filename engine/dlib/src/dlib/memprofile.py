@@ -12,9 +12,12 @@
 # CONDITIONS OF ANY KIND, either express or implied. See the License for the
 # specific language governing permissions and limitations under the License.
 
-import sys, subprocess, hashlib, os
+import sys, subprocess, os, threading, re, mmap
 
 class Trace(object):
+    # There is one of these per line in the trace file
+    __slots__ = ('type', 'ptr', 'size', 'back_trace', 'back_trace_hash')
+
     def __init__(self, type, ptr, size, back_trace, back_trace_hash):
         self.type = type
         self.ptr = ptr
@@ -26,6 +29,8 @@ class Trace(object):
         return 'TRACE: back_trace: %s back_trace_hash: %s, size: %d, ptr: %X, type: %s' % (str(self.back_trace), self.back_trace_hash, self.size, self.ptr, str(self.type))
 
 class TraceSummary(object):
+    __slots__ = ('nmalloc', 'nfree', 'malloc_total', 'free_total', 'active_total', 'back_trace')
+
     def __init__(self, lst):
         self.nmalloc = 0
         self.nfree = 0
@@ -35,18 +40,25 @@ class TraceSummary(object):
         self.back_trace = None
 
         for t in lst:
-            assert self.back_trace == None or self.back_trace == t.back_trace
-            self.back_trace = t.back_trace
-            if t.type == 'M':
-                assert self.nfree == 0
-                self.nmalloc += 1
-                self.malloc_total += t.size
-            elif t.type == 'F':
-                assert self.nmalloc == 0
-                self.nfree += 1
-                self.free_total += t.size
-            else:
-                assert False
+            self.update(t)
+
+    @classmethod
+    def empty(cls):
+        return cls(())
+
+    def update(self, t):
+        assert self.back_trace == None or self.back_trace == t.back_trace
+        self.back_trace = t.back_trace
+        if t.type == 'M':
+            assert self.nfree == 0
+            self.nmalloc += 1
+            self.malloc_total += t.size
+        elif t.type == 'F':
+            assert self.nmalloc == 0
+            self.nfree += 1
+            self.free_total += t.size
+        else:
+            assert False
 
     def __repr__(self):
         return 'TRACESUMMARY: back_trace: %s nmalloc: %d, nfree: %d, malloc_total: %d, free_total: %d' % (str(self.back_trace), self.nmalloc,  self.nfree, self.malloc_total, self.free_total)
@@ -60,44 +72,76 @@ class MemProfile(object):
         # Trace to allocation summary
         self.summary = {}
 
+# Number of addresses written to addr2line/atos at a time
+SYMBOL_BATCH_SIZE = 4096
+
 def load_symbol_table(addresses, executable):
-    symbol_table = {}
     if sys.platform == 'darwin':
         p = subprocess.Popen(['atos', '-o', executable], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
     else:
         p = subprocess.Popen(['addr2line', '-e', executable], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
 
-    str = ''
-    for s in addresses:
-        str += "0x%x\n" % s
-    stdout, stderr = p.communicate(str.encode())
+    addresses = list(addresses)
+
+    # The addresses are fed from a thread while we read the symbols as they come,
+    # so neither side has to hold all of its text in memory
+    def write_addresses():
+        for i in range(0, len(addresses), SYMBOL_BATCH_SIZE):
+            batch = addresses[i:i + SYMBOL_BATCH_SIZE]
+            p.stdin.write(''.join(["0x%x\n" % s for s in batch]).encode())
+        p.stdin.close()
 
-    text_symbols = stdout.decode().split('\n')
-    symbol_table = {}
-    for i,s in enumerate(addresses):
-        symbol_table[s] = text_symbols[i]
+    writer = threading.Thread(target=write_addresses)
+    writer.start()
 
+    symbol_table = dict.fromkeys(addresses)
+    for s, line in zip(addresses, p.stdout):
+        symbol_table[s] = line.decode().rstrip('\n')
+
+    writer.join()
+    p.wait()
     return symbol_table
 
+# A line in the trace file: type, pointer, size and the backtrace addresses
+TRACE_LINE_RE = re.compile(rb'^([MF]) (\S+) (\S+) ([^\n]*)', re.MULTILINE)
+
+def read_trace(path):
+    # The file is scanned with a single regex over an mmap, instead of reading and splitting it line by line
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return # can't mmap an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for m in TRACE_LINE_RE.finditer(data):
+                yield m.groups()
+
 def load(trace, executable):
     mem_profile = MemProfile()
-    traces = []
     active_allocations = {}
-    trace_file = open(trace, 'r')
-    for line in trace_file:
-
-        type, ptr, size, trace = line.split(' ', 3)
+    # Backtrace text to the address list shared by all traces with that backtrace.
+    # Most traces come from a few call sites, so each backtrace is only parsed once
+    back_traces = {}
+    for type, ptr, size, trace in read_trace(trace):
+        type = type.decode()
         ptr, size = int(ptr, 16), int(size, 16)
 
-        lst = []
-        for s in trace.split():
-            x = int(s, 16)
-            mem_profile.symbol_table[x] = None
-            lst.append(int(s, 16))
+        lst = back_traces.get(trace)
+        if lst is None:
+            lst = [int(s, 16) for s in trace.split()]
+            mem_profile.symbol_table.update(dict.fromkeys(lst))
+            back_traces[trace] = lst
 
-        h = hashlib.md5(trace.encode()).digest()
+        # The backtrace text itself is the key. Python hashes it (and caches the hash)
+        # without the cost of md5, and unlike a bare hash() it can't collide
+        h = trace
         trace = Trace(type, ptr, size, lst, h)
-        traces.append(trace)
+
+        # Group and summarize the traces as they are parsed, rather than in passes afterwards
+        group = mem_profile.traces.get(h)
+        if group is None:
+            group = mem_profile.traces[h] = []
+            mem_profile.summary[h] = TraceSummary.empty()
+        group.append(trace)
+        mem_profile.summary[h].update(trace)
 
         if type == 'M':
             active_allocations[ptr] = trace
@@ -105,24 +149,11 @@ def load(trace, executable):
             if ptr in active_allocations:
                 del(active_allocations[ptr])
 
-    trace_file.close()
-
     mem_profile.symbol_table = load_symbol_table(mem_profile.symbol_table.keys(), executable)
 
-    cache = {}
-    for t in traces:
-        if not t.back_trace_hash in cache:
-            lst = [ mem_profile.symbol_table[x] for x in t.back_trace ]
-            cache[t.back_trace_hash] = lst
-        t.back_trace = cache[t.back_trace_hash]
-
-        lst = mem_profile.traces.get(t.back_trace_hash, [])
-        lst.append(t)
-        mem_profile.traces[t.back_trace_hash] = lst
-
-    for k, lst in mem_profile.traces.items():
-        assert not k in mem_profile.summary
-        mem_profile.summary[k] = TraceSummary(lst)
+    # Symbolizing the shared lists in place updates all the traces using them
+    for lst in back_traces.values():
+        lst[:] = [ mem_profile.symbol_table[x] for x in lst ]
 
     for ptr, t in active_allocations.items():
         mem_profile.summary[t.back_trace_hash].active_total += t.size
@@ -149,41 +180,29 @@ if __name__ == '__main__':
 
     profile = load(sys.argv[2], sys.argv[1])
 
-    lst = profile.summary.values()
-    lst.sort(lambda x,y: cmp(y.malloc_total, x.malloc_total))
+    lst = sorted(profile.summary.values(), key=lambda s: s.malloc_total, reverse=True)
     active_total = 0
     for s in lst:
         if s.nmalloc > 0:
             active_total += s.active_total
 
-    print ('<html>')
-    print ('<b>Active total: %s</b>' % fmt_memory(active_total))
-    print ('<p>')
-    print ('<table border="1">')
-    print ('<td><b>Backtrace</b></td><td><b>Allocations</b></td><td><b>Total</b></td><td><b>Active</b></td><tr/>')
+    out = []
+    out.append('<html>\n')
+    out.append('<b>Active total: %s</b>\n' % fmt_memory(active_total))
+    out.append('<p>\n')
+    out.append('<table border="1">\n')
+    out.append('<td><b>Backtrace</b></td><td><b>Allocations</b></td><td><b>Total</b></td><td><b>Active</b></td><tr/>\n')
     for s in lst:
         if s.nmalloc > 0:
-            bt = ''
+            bt = []
             for x in s.back_trace:
                 try:
                     int(x, 16)
                 except ValueError:
-                    bt += x.split('(')[0] + '<br>\n'
-
-            tot = '%d B' % s.malloc_total
-            if s.malloc_total > 1024*1024:
-                tot = '%d M' % (s.malloc_total / (1024.0*1024.0))
-            elif s.malloc_total > 1024:
-                tot = '%d K' % (s.malloc_total / (1024.0))
-
-            active = '%d B' % s.active_total
-            if s.active_total > 1024*1024:
-                active = '%d M' % (s.active_total / (1024.0*1024.0))
-            elif s.active_total > 1024:
-                active = '%d K' % (s.active_total / (1024.0))
-
-            print ('<td>%s</td><td>%d</td><td>%s</td><td>%s</td><tr/>' % (bt, s.nmalloc, tot, active))
+                    bt.append(x.split('(')[0] + '<br>\n')
 
-    print ('</table>')
-    print ('</html>')
+            out.append('<td>%s</td><td>%d</td><td>%s</td><td>%s</td><tr/>\n' % (''.join(bt), s.nmalloc, fmt_memory(s.malloc_total), fmt_memory(s.active_total)))
 
+    out.append('</table>\n')
+    out.append('</html>\n')
+    sys.stdout.write(''.join(out))
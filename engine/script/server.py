@@ -18,21 +18,27 @@ from http.server import HTTPServer, BaseHTTPRequestHandler
 import threading
 import time
 import sys
+import os
 import socket
 
+HELLO = b'Hello'
+PONG = b'PONG'
+PONG_PUT = b'PONG_PUT'
+READ_CHUNK_SIZE = 64 * 1024
+
 class Handler(BaseHTTPRequestHandler):
 
     def version_string(self):
         return "Dynamo 1.0"
 
     def do_GET(self):
-        to_send = ""
+        to_send = b""
         if self.path == "/":
             a,b = self.headers.get('X-A', None), self.headers.get('X-B', None)
             if a and b:
-                to_send = 'Hello %s%s' % (a, b)
+                to_send = ('Hello %s%s' % (a, b)).encode('ascii')
             else:
-                to_send = 'Hello'
+                to_send = HELLO
 
         elif self.path.startswith('/sleep'):
 
@@ -45,12 +51,12 @@ class Handler(BaseHTTPRequestHandler):
                     self.send_response(500, "Could not parse time argument as float: %s" % self.path)
                     self.send_header("Content-type", "text/plain")
                     self.end_headers()
-                    self.wfile.write(to_send.encode('ascii'))
+                    self.wfile.write(to_send)
                     return
 
             sys.stdout.flush()
             time.sleep( sleeptime )
-            to_send = "slept for %f" % sleeptime
+            to_send = ("slept for %f" % sleeptime).encode('ascii')
 
         if to_send:
             self.send_response(200)
@@ -59,26 +65,27 @@ class Handler(BaseHTTPRequestHandler):
 
         self.send_header("Content-type", "text/plain")
         self.end_headers()
-        self.wfile.write(to_send.encode('ascii'))
+        self.wfile.write(to_send)
 
-    def do_POST(self):
-        len = self.headers.get('Content-Length')
-        s = self.rfile.read(int(len))
+    def echo_body(self, prefix):
+        # Stream the request body back in chunks, rather than reading it all into memory first
+        remaining = int(self.headers.get('Content-Length'))
         self.send_response(200)
         self.send_header("Content-type", "text/plain")
         self.end_headers()
-        self.wfile.write('PONG'.encode('ascii'))
-        self.wfile.write(s)
+        self.wfile.write(prefix)
+        while remaining > 0:
+            chunk = self.rfile.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
 
-    def do_PUT(self):
-        len = self.headers.get('Content-Length')
-        s = self.rfile.read(int(len))
+    def do_POST(self):
+        self.echo_body(PONG)
 
-        self.send_response(200)
-        self.send_header("Content-type", "text/plain")
-        self.end_headers()
-        self.wfile.write('PONG_PUT'.encode('ascii'))
-        self.wfile.write(s)
+    def do_PUT(self):
+        self.echo_body(PONG_PUT)
 
     def do_HEAD(self):
         self.send_response(200)
@@ -89,6 +96,17 @@ class Handler(BaseHTTPRequestHandler):
 
 class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
     """ """
+    # Handlers still sleeping in /sleep shouldn't keep the process alive, or be joined on close
+    daemon_threads = True
+    block_on_close = False
+    request_queue_size = 512
+
+
+class ReusePortHTTPServer(ThreadedHTTPServer):
+    """ Lets several server processes listen on the same port, with the kernel balancing the accepts """
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        ThreadedHTTPServer.server_bind(self)
 
 
 class Server(Thread):
@@ -109,6 +127,38 @@ class Server(Thread):
         self.server.shutdown()
 
 
-if __name__ == '__main__':
-    server = ThreadedHTTPServer(('localhost', 9001), Handler)
+def serve_reuseport():
+    server = ReusePortHTTPServer(('localhost', 9001), Handler)
     server.serve_forever()
+
+
+def serve_processes(count):
+    import multiprocessing, signal
+    children = [multiprocessing.Process(target=serve_reuseport, daemon=True) for i in range(count - 1)]
+    for child in children:
+        child.start()
+
+    # Don't leave servers behind on the port when we're stopped
+    def stop(signum, frame):
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    serve_reuseport()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=1, help='Number of server processes listening on the port (requires SO_REUSEPORT)')
+    args = parser.parse_args()
+
+    if args.processes > 1 and hasattr(socket, 'SO_REUSEPORT'):
+        serve_processes(args.processes)
+    else:
+        server = ThreadedHTTPServer(('localhost', 9001), Handler)
+        server.serve_forever()
@@ -264,6 +264,7 @@ class Configuration(object):
                  codesigning_identity = None,
                  windows_cert = None,
                  windows_cert_pass = None,
+                 editor_platforms = None,
                  verbose = False):
 
         if sys.platform == 'win32':
@@ -306,6 +307,7 @@ class Configuration(object):
         self.codesigning_identity = codesigning_identity
         self.windows_cert = windows_cert
         self.windows_cert_pass = windows_cert_pass
+        self.editor_platforms = editor_platforms
         self.verbose = verbose
 
         if self.github_token is None:
@@ -1359,13 +1361,15 @@ class Configuration(object):
         if not self.channel:
             raise Exception('No channel provided when bundling the editor')
 
-        cmd = [self.get_python(), './scripts/bundle.py',
-               '--platform=%s' % self.target_platform,
-               '--version=%s' % self.version,
-               '--channel=%s' % self.channel,
-               '--engine-artifacts=%s' % self.engine_artifacts,
-               '--archive-domain=%s' % self.archive_domain,
-               'bundle']
+        # bundle.py accepts several platforms, and then only sets up the build jdk once
+        platforms = self.editor_platforms or [self.target_platform]
+        cmd = [self.get_python(), './scripts/bundle.py']
+        cmd += ['--platform=%s' % platform for platform in platforms]
+        cmd += ['--version=%s' % self.version,
+                '--channel=%s' % self.channel,
+                '--engine-artifacts=%s' % self.engine_artifacts,
+                '--archive-domain=%s' % self.archive_domain,
+                'bundle']
         self.run_editor_script(cmd)
 
     def sign_editor2(self):
@@ -2260,6 +2264,11 @@ To pass on arbitrary options to waf: build.py OPTIONS COMMANDS -- WAF_OPTIONS
                       default = None,
                       help = 'Path to file containing password to codesigning certificate for Windows version of the editor')
 
+    parser.add_option('--editor-platform', dest='editor_platforms',
+                      default = None,
+                      action = 'append',
+                      help = 'Platform to create an editor bundle for with bundle_editor2. Specify multiple times for multiple platforms. Default is --platform')
+
     parser.add_option('--verbose', dest='verbose',
                       action = 'store_true',
                       default = False,
@@ -2303,6 +2312,7 @@ To pass on arbitrary options to waf: build.py OPTIONS COMMANDS -- WAF_OPTIONS
                       codesigning_identity = options.codesigning_identity,
                       windows_cert = options.windows_cert,
                       windows_cert_pass = options.windows_cert_pass,
+                      editor_platforms = options.editor_platforms,
                       verbose = options.verbose)
 
     for cmd in args:
@@ -15,7 +15,8 @@
 
 
 
-import os, sys, shutil, subprocess
+import os, sys, re, shutil, subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 PLATFORMS=[]
 for p in ['nx64', 'ps4', 'ps5']:
@@ -50,39 +51,38 @@ LOCAL_PATTERNS.append('build/')
 LOCAL_PATTERNS.append('editor/target/classes/')
 LOCAL_PATTERNS.append('dynamo_home')
 
+# All substrings of a kind in one regex, so each path is scanned once
+LOCAL_RE = re.compile('|'.join(map(re.escape, LOCAL_PATTERNS)))
+PRIVATE_RE = re.compile('|'.join(map(re.escape, PLATFORMS+FILE_PATTERNS)))
+
 def is_local_file(path):
-    for pattern in LOCAL_PATTERNS:
-        if pattern in path:
-            return True
-    return False
+    return LOCAL_RE.search(path) is not None
 
 def is_private_file(path):
-    for pattern in PLATFORMS+FILE_PATTERNS:
-        if pattern in path:
-            print("Skipping", path)
-            return True
+    if PRIVATE_RE.search(path) is not None:
+        print("Skipping", path)
+        return True
     return False
 
-def is_git_tracked(path, cwd):
-    #oldcwd = os.getcwd()
-    #os.chdir(cwd)
-    cmd = 'git ls-files --error-unmatch %s' % path
-    #r = os.system(cmd)
-
-    process = subprocess.Popen(cmd.split(), cwd=cwd)
-    process.wait()
-    #output = process.communicate()[0]
-    return process.returncode == 0
+def get_git_tracked_files(cwd):
+    # All tracked files (relative to cwd) from a single git call, instead of asking git once per file
+    output = subprocess.check_output(['git', 'ls-files', '-z'], cwd=cwd)
+    return [os.fsdecode(path) for path in output.split(b'\0') if path]
 
-    #os.chdir(oldcwd)
-    #return r == 0
+created_dirs = set()
 
 def copy_file(src, tgt):
     dirname = os.path.dirname(tgt)
-    if not os.path.exists(dirname):
-        os.makedirs(dirname)
+    if dirname not in created_dirs: # most files share their directory with the previous one
+        os.makedirs(dirname, exist_ok=True)
+        created_dirs.add(dirname)
     shutil.copy2(src, tgt)
 
+def copy_tracked_file(src, tgt):
+    # Tracked paths that aren't files are submodules, or files deleted from the working tree
+    if os.path.isfile(src):
+        copy_file(src, tgt)
+
 def Usage():
     print("Usage: ./copy_from_private_repo.py <src> <tgt>")
 
@@ -98,30 +98,21 @@ if __name__ == '__main__':
     src = os.path.normpath(src)
     tgt = os.path.normpath(tgt)
 
-    for root, dirs, files in os.walk(src):
-        for f in files:
-            path = os.path.join(root, f)
-            path = path.replace('\\', '/')
-
-            relative_path = os.path.relpath(path, src)
-            relative_path = relative_path.replace('\\', '/')
-
+    # Rather than walking the source tree, we go through the files git knows about.
+    # The copying is I/O bound, so it's done by a pool of threads
+    with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4) as executor:
+        futures = []
+        for relative_path in sorted(get_git_tracked_files(src)):
             if is_local_file(relative_path):
                 continue
             if is_private_file(relative_path):
                 continue
 
+            path = src + '/' + relative_path
             tgtfile = tgt + '/' + relative_path
+            futures.append(executor.submit(copy_tracked_file, path, tgtfile))
 
-            #print "path", path
-            #print "relative_path", relative_path
-            #print "tgtfile", tgtfile
-
-            if not is_git_tracked(relative_path, src):
-                continue
-
-            copy_file(path, tgtfile)
-
-            #exit(1)
+        for future in as_completed(futures):
+            future.result()
 
     print("Done!")
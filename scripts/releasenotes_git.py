@@ -37,6 +37,14 @@ Set your build server to https://build-stage.defold.com
 
 """
 
+# compiled once, since they are matched against every line of the log
+ISSUE_RE = re.compile(r"^([a-fA-F0-9]+) (?:issue[\-\s]?)?#?(\d+)[:.]? (.*)", re.IGNORECASE)
+MERGE_RE = re.compile(r"(\w+)\s(?:Revert\s\")?Merge pull request\s#(\d+)\s.+?(?:Issue|issue[\-]?)?(\d+).+")
+MERGE_DESC_RE = re.compile(r"^(?:Issue|issue)(?:[\-\s]?)?#?(\d+)[:.\-\s]+(.+)")
+PULLREQUEST_RE = re.compile(r"([a-fA-F0-9]+) (.*) \(\#(\d+)\)$")
+PULLREQUEST_SUFFIX_RE = re.compile(r"^(.*) \(\#\d+\)$")
+EDITOR_ISSUE_RE = re.compile(r"^([a-fA-F0-9]+) (.*) \(DEFEDIT-(\d+)\)")
+
 def run(cmd, shell=False):
     p = subprocess.Popen(cmd.split(), stdout=subprocess.PIPE, shell=shell)
     p.wait()
@@ -46,6 +54,18 @@ def run(cmd, shell=False):
 
     return out
 
+def stream(cmd):
+    # yields the output lines as git produces them, instead of buffering all of it
+    p = subprocess.Popen(cmd.split(), stdout=subprocess.PIPE, bufsize=-1, universal_newlines=True)
+    try:
+        for l in p.stdout:
+            yield l.rstrip('\n')
+    finally:
+        p.stdout.close()
+        returncode = p.wait()
+    if returncode != 0:
+        raise Exception("Failed to run: " + cmd)
+
 def read_version():
     # read the version number from the VERSION file
     with open('VERSION', 'rb') as f:
@@ -58,12 +78,30 @@ def get_sha1_from_tag(tag):
     return run('git log -1 --format=format:%%H %s' % tag)
 
 
+# the log entries of all the commits since the previous release, keyed on their abbreviated sha1
+commit_logs = {}
+
+def read_commit_logs(sha1):
+    # fetch the whole range with a single git call, instead of one call per matched commit
+    # --abbrev-commit gives the same sha1 as the --oneline listing
+    current = None
+    for l in stream("git log %s..HEAD --abbrev-commit" % sha1):
+        if l.startswith('commit '):
+            current = []
+            commit_logs[l.split()[1]] = current
+        if current is not None:
+            current.append(l)
+    for k, v in commit_logs.items():
+        commit_logs[k] = '\n'.join(v).rstrip()
+
 def git_log(sha1):
+    if sha1 in commit_logs:
+        return commit_logs[sha1]
     return run("git log %s -1" % sha1)
 
 
 def git_merge_desc(sha1):
-    s = run("git show %s" % sha1)
+    s = git_log(sha1)
     desc = ''
     skip_lines = 1
     for l in s.split('\n'):
@@ -81,13 +119,13 @@ def git_merge_desc(sha1):
 
 def match_issue(line):
     # 974d82a24 Issue-4684 - Load vulkan functions dynamically on android (#4692)
-    issue_match = re.search("^(?i)([a-fA-F0-9]+) (?:issue[\-\s]?)?#?(\d+)[:.]? (.*)", line)
+    issue_match = ISSUE_RE.search(line)
     if issue_match:
         sha1 = issue_match.group(1)
         issue = issue_match.group(2)
         desc = issue_match.group(3)
         # get rid of PR number at the end of the commit
-        m = re.search("^(.*) \(\#\d+\)$", desc)
+        m = PULLREQUEST_SUFFIX_RE.search(desc)
         if m:
             desc = m.group(1)
         return (sha1, issue, desc)
@@ -96,7 +134,7 @@ def match_issue(line):
 def match_merge(line):
     # 3bd2324df Merge pull request #5061 from defold/issue-5060-engine-info-platform
     # 3bd2324df Revert "Merge pull request #5030 from defold/issue-5029-emscripten-1-39-20"
-    merge_match = re.search("(\w+)\s(?:Revert\s\")?Merge pull request\s#(\d+)\s.+?(?:Issue|issue[\-]?)?(\d+).+", line)
+    merge_match = MERGE_RE.search(line)
     if merge_match:
         sha1  = merge_match.group(1)
         pr    = merge_match.group(2)
@@ -104,7 +142,7 @@ def match_merge(line):
         desc  = git_merge_desc(sha1)
 
         # get rid of PR number at the end of the commit
-        m = re.search("^(?:Issue|issue)(?:[\-\s]?)?#?(\d+)[:.\-\s]+(.+)", desc)
+        m = MERGE_DESC_RE.search(desc)
         if m:
             desc = m.group(2)
             if not issue:
@@ -115,7 +153,7 @@ def match_merge(line):
 
 def match_pullrequest(line):
     # bca92cc0f Check that there's a world before creating a collision object (#4747)
-    pull_match = re.search("([a-fA-F0-9]+) (.*) \(\#(\d+)\)$", line)
+    pull_match = PULLREQUEST_RE.search(line)
     if pull_match:
         sha1 = pull_match.group(1)
         desc = pull_match.group(2)
@@ -151,7 +189,7 @@ def get_editor_issues(lines):
     issues = []
     for line in lines:
         # bca92cc0f Foobar (DEFEDIT-4747)
-        m = re.search("^([a-fA-F0-9]+) (.*) \(DEFEDIT-(\d+)\)", line)
+        m = EDITOR_ISSUE_RE.search(line)
         if m:
             sha1 = m.group(1)
             desc = m.group(2)
@@ -161,12 +199,14 @@ def get_editor_issues(lines):
     return issues
 
 def get_all_changes(version, sha1):
-    out = run("git log %s..HEAD --oneline" % sha1)
-    lines = out.split('\n')
-
-    print out
+    lines = []
+    for l in stream("git log %s..HEAD --oneline" % sha1):
+        print(l)
+        lines.append(l)
     print("#" + "*" * 64)
 
+    read_commit_logs(sha1)
+
     engine_issues = get_engine_issues(lines)
     editor_issues = get_editor_issues(lines)
 
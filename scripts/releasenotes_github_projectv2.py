@@ -28,6 +28,25 @@ TYPE_BREAKING_CHANGE = "BREAKING CHANGE"
 TYPE_FIX = "FIX"
 TYPE_NEW = "NEW"
 
+# Everything from the first of these sections to the end of the body is removed. Cutting
+# at the earliest match gives the same result as cutting at each pattern in turn
+BODY_TRUNCATE_RE = re.compile("## PR checklist|### Technical changes|Technical changes:|Technical notes:")
+
+# These are applied one after the other, since removing one match can expose or hide another
+BODY_CLEANUP_RES = (
+    # Remove closing keywords
+    re.compile("Fixes .*/.*#.....*", re.IGNORECASE),
+    re.compile("Fix .*/.*#.....*", re.IGNORECASE),
+    re.compile("Fixes #.....*", re.IGNORECASE),
+    re.compile("Fix #.....*", re.IGNORECASE),
+    re.compile("Fixes https.*", re.IGNORECASE),
+    re.compile("Fix https.*", re.IGNORECASE),
+
+    # Remove "user facing changes" header
+    re.compile("User-facing changes:", re.IGNORECASE),
+    re.compile("### User-facing changes", re.IGNORECASE),
+)
+
 # https://docs.github.com/en/graphql/overview/explorer
 QUERY_CLOSED_ISSUES = r"""
 {
@@ -60,7 +79,11 @@ QUERY_PROJECT_ISSUES_AND_PRS = r"""
     projectV2(number: %s) {
       id
       title
-      items(first: 100) {
+      items(first: 100%s) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
         nodes {
           type
           content {
@@ -76,7 +99,7 @@ QUERY_PROJECT_ISSUES_AND_PRS = r"""
                   name
                 }
               }
-              timelineItems(first: 100) {
+              timelineItems(first: 100, itemTypes: [CROSS_REFERENCED_EVENT]) {
                 nodes {
                   ... on CrossReferencedEvent {
                     source {
@@ -110,7 +133,7 @@ QUERY_PROJECT_ISSUES_AND_PRS = r"""
                   name
                 }
               }
-              timelineItems(first: 100) {
+              timelineItems(first: 100, itemTypes: [CROSS_REFERENCED_EVENT]) {
                 nodes {
                   ... on CrossReferencedEvent {
                     source {
@@ -162,11 +185,20 @@ def get_project(name):
     response = github.query(query, token)
     return response["data"]["organization"]["projectsV2"]["nodes"][0]
 
-def get_issues_and_prs(project):
-    query = QUERY_PROJECT_ISSUES_AND_PRS % project.get("number")
-    response = github.query(query, token)
-    response = response["data"]["organization"]["projectV2"]["items"]["nodes"]
-    return response
+# yields the project items one page at a time, so that projects with more than
+# 100 items are complete and only a single page is held in memory
+def iter_issues_and_prs(project):
+    cursor = None
+    while True:
+        after = (', after: "%s"' % cursor) if cursor else ""
+        query = QUERY_PROJECT_ISSUES_AND_PRS % (project.get("number"), after)
+        response = github.query(query, token)
+        items = response["data"]["organization"]["projectV2"]["items"]
+        for node in items["nodes"]:
+            yield node
+        if not items["pageInfo"]["hasNextPage"]:
+            break
+        cursor = items["pageInfo"]["endCursor"]
 
 def get_labels(issue_or_pr):
     labels = []
@@ -213,8 +245,8 @@ def generate(version, hide_details = False):
         return None
 
     output = []
-    merged = get_issues_and_prs(project)
-    for m in merged:
+    seen_numbers = set()
+    for m in iter_issues_and_prs(project):
         content = m.get("content")
         if not content:
             continue
@@ -243,31 +275,20 @@ def generate(version, hide_details = False):
             "is_issue": is_issue,
             "type": issue_type
         }
-        # strip from match to end of file
-        entry["body"] = re.sub("## PR checklist.*", "", entry["body"], flags=re.DOTALL).strip()
-        entry["body"] = re.sub("### Technical changes.*", "", entry["body"], flags=re.DOTALL).strip()
-        entry["body"] = re.sub("Technical changes:.*", "", entry["body"], flags=re.DOTALL).strip()
-        entry["body"] = re.sub("Technical notes:.*", "", entry["body"], flags=re.DOTALL).strip()
-
-        # Remove closing keywords
-        entry["body"] = re.sub("Fixes .*/.*#.....*", "", entry["body"], flags=re.IGNORECASE).strip()
-        entry["body"] = re.sub("Fix .*/.*#.....*", "", entry["body"], flags=re.IGNORECASE).strip()
-        entry["body"] = re.sub("Fixes #.....*", "", entry["body"], flags=re.IGNORECASE).strip()
-        entry["body"] = re.sub("Fix #.....*", "", entry["body"], flags=re.IGNORECASE).strip()
-        entry["body"] = re.sub("Fixes https.*", "", entry["body"], flags=re.IGNORECASE).strip()
-        entry["body"] = re.sub("Fix https.*", "", entry["body"], flags=re.IGNORECASE).strip()
-
-        # Remove "user facing changes" header
-        entry["body"] = re.sub("User-facing changes:", "", entry["body"], flags=re.IGNORECASE).strip()
-        entry["body"] = re.sub("### User-facing changes", "", entry["body"], flags=re.IGNORECASE).strip()
-
-        duplicate = False
-        for o in output:
-            if o.get("number") == entry.get("number"):
-                duplicate = True
-                break
-        if not duplicate:
-            output.append(entry)
+        body = entry["body"]
+        m = BODY_TRUNCATE_RE.search(body)
+        if m:
+            body = body[:m.start()]
+        body = body.strip()
+        for pattern in BODY_CLEANUP_RES:
+            body = pattern.sub("", body).strip()
+        entry["body"] = body
+
+        # an issue and its closing pr end up as the same entry
+        if entry["number"] in seen_numbers:
+            continue
+        seen_numbers.add(entry["number"])
+        output.append(entry)
 
     engine = []
     editor = []